@@ -49,6 +49,7 @@ class ImageSaveAdminForm(ModelForm):
 
 class BricksAdmin(admin.ModelAdmin):
     form = ImageSaveAdminForm
+    readonly_fields = ('image_status',)
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "category":
@@ -58,6 +59,7 @@ class BricksAdmin(admin.ModelAdmin):
 
 class BuildingBlocksAdmin(admin.ModelAdmin):
     form = ImageSaveAdminForm
+    readonly_fields = ('image_status',)
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "category":
@@ -70,6 +72,7 @@ class SmartphonesAdmin(admin.ModelAdmin):
     change_form_template = 'admin.html'
     # form = ImageSaveAdminForm
     form = SmartphonesAdminForm
+    readonly_fields = ('image_status',)
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "category":
@@ -85,3 +88,4 @@ admin.site.register(CartProduct)
 admin.site.register(Cart)
 admin.site.register(Customer)
 admin.site.register(Order)
+admin.site.register(ImageJob)
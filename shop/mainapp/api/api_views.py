@@ -4,17 +4,32 @@ from rest_framework.response import Response
 from rest_framework.generics import ListAPIView, RetrieveAPIView, ListCreateAPIView, RetrieveUpdateAPIView
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import SearchFilter
+from rest_framework.views import APIView
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import IsAdminUser
+from django.http import StreamingHttpResponse
 
 from .serializers import (CategorySerializer,
                           SmartphoneSerializer,
                           CustomerSerializer,
+                          CustomerWithOrdersSerializer,
                           BrickSerializer,
-                          BuildingBlockSerializer)
+                          BuildingBlockSerializer,
+                          ProductIndexSerializer)
 from ..models import (Category,
                       Smartphones,
                       Customer,
                       Bricks,
                       BuildingBlocks)
+from ..cache import catalog_cache
+from ..facets import FACET_MODELS, get_facet_index
+from ..pagecache import get_page_cache_stats
+from ..exports import EXPORT_FORMATS, export_orders, export_products
+from ..search import search_products
+from .filters import FacetFilterBackend
+from .conditional import ConditionalGetAPIMixin
+from .fast import FastReadMixin
+from .pagination import KeysetPagination
 
 
 class CategoryPagination(PageNumberPagination):
@@ -36,62 +51,180 @@ class CategoryAPIView(ListCreateAPIView, RetrieveUpdateAPIView):
 
     serializer_class = CategorySerializer
     pagination_class = CategoryPagination
-    queryset = Category.objects.all()
+    queryset = Category.objects.order_by('id')
     #lookup_field = 'id'
 
 
-class SmartphoneListAPIView(ListAPIView):
+class SmartphoneListAPIView(ConditionalGetAPIMixin, FastReadMixin, ListAPIView):
 
     serializer_class = SmartphoneSerializer
+    pagination_class = KeysetPagination
     queryset = Smartphones.objects.all()
-    filter_backends = [SearchFilter]
+    filter_backends = [SearchFilter, FacetFilterBackend]
     search_fields = [
         'price'
     ]
 
 
-class SmartphoneDetailAPIView(RetrieveAPIView):
+class SmartphoneDetailAPIView(ConditionalGetAPIMixin, FastReadMixin, RetrieveAPIView):
 
     serializer_class = SmartphoneSerializer
     queryset = Smartphones.objects.all()
     lookup_field = 'id'
 
 
-class BrickListAPIView(ListAPIView):
+class BrickListAPIView(ConditionalGetAPIMixin, FastReadMixin, ListAPIView):
 
     serializer_class = BrickSerializer
+    pagination_class = KeysetPagination
     queryset = Bricks.objects.all()
-    filter_backends = [SearchFilter]
+    filter_backends = [SearchFilter, FacetFilterBackend]
     search_fields = [
         'price'
     ]
 
 
-class BrickDetailAPIView(RetrieveAPIView):
+class BrickDetailAPIView(ConditionalGetAPIMixin, FastReadMixin, RetrieveAPIView):
 
     serializer_class = BrickSerializer
     queryset = Bricks.objects.all()
     lookup_field = 'id'
 
 
-class BuildingBlockListAPIView(ListAPIView):
+class BuildingBlockListAPIView(ConditionalGetAPIMixin, FastReadMixin, ListAPIView):
 
     serializer_class = BuildingBlockSerializer
+    pagination_class = KeysetPagination
     queryset = BuildingBlocks.objects.all()
-    filter_backends = [SearchFilter]
+    filter_backends = [SearchFilter, FacetFilterBackend]
     search_fields = [
         'price'
     ]
 
 
-class BuildingBlockDetailAPIView(RetrieveAPIView):
+class BuildingBlockDetailAPIView(ConditionalGetAPIMixin, FastReadMixin, RetrieveAPIView):
 
     serializer_class = BuildingBlockSerializer
     queryset = BuildingBlocks.objects.all()
     lookup_field = 'id'
 
 
+class ProductSearchAPIView(ConditionalGetAPIMixin, ListAPIView):
+
+    serializer_class = ProductIndexSerializer
+    default_limit = 20
+    max_limit = 100
+
+    def get_queryset(self):
+        query = self.request.query_params.get('q', '')
+        try:
+            limit = max(1, min(int(self.request.query_params.get('limit', self.default_limit)), self.max_limit))
+        except ValueError:
+            limit = self.default_limit
+        return search_products(query, limit=limit, ct_models=self.request.query_params.getlist('model'))
+
+
+class ProductFacetsAPIView(ConditionalGetAPIMixin, APIView):
+
+    def get_fresh_response(self, request, *args, **kwargs):
+        model = FACET_MODELS.get(kwargs['ct_model'])
+        if model is None:
+            raise NotFound
+        facet_index = get_facet_index(model)
+        selected = facet_index.get_selected(request.query_params)
+        return Response(OrderedDict([
+            ('count', facet_index.get_total(selected)),
+            ('facets', facet_index.get_counts(selected))
+        ]))
+
+
+class CacheStatsAPIView(APIView):
+
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response(OrderedDict([
+            ('process', catalog_cache.get_stats()),
+            ('pages', get_page_cache_stats())
+        ]))
+
+
+class CustomerPagination(KeysetPagination):
+
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',)
+    }
+
+
 class CustomerAPIView(ListAPIView):
 
     serializer_class = CustomerSerializer
-    queryset = Customer.objects.all()
\ No newline at end of file
+    pagination_class = CustomerPagination
+    queryset = Customer.objects.select_related('user')
+
+    def include_orders(self):
+        return 'orders' in self.request.query_params.get('include', '').split(',')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_orders():
+            queryset = queryset.prefetch_related('orders')
+        return queryset
+
+    def get_serializer_class(self):
+        if self.include_orders():
+            return CustomerWithOrdersSerializer
+        return self.serializer_class
+
+
+class ExportAPIView(APIView):
+
+    permission_classes = [IsAdminUser]
+    export_name = None
+    export_stream = None
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get('output', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({'output': 'Допустимые форматы: {}'.format(', '.join(EXPORT_FORMATS))})
+        compress = request.query_params.get('gzip', '').lower() in ('1', 'true', 'yes')
+        stream = self.export_stream(export_format=export_format, compress=compress, **self.get_export_kwargs())
+        filename = '{}.{}'.format(self.get_export_name(), export_format)
+        if compress:
+            response = StreamingHttpResponse(stream, content_type='application/gzip')
+            filename += '.gz'
+        else:
+            response = StreamingHttpResponse(stream, content_type=EXPORT_FORMATS[export_format])
+        response['Content-Disposition'] = 'attachment; filename="{}"'.format(filename)
+        return response
+
+    def get_export_name(self):
+        return self.export_name
+
+    def get_export_kwargs(self):
+        return {}
+
+
+class ProductExportAPIView(ExportAPIView):
+
+    export_name = 'products'
+    export_stream = staticmethod(export_products)
+
+    def get_ct_model(self):
+        ct_model = self.request.query_params.get('model')
+        if ct_model is not None and ct_model not in FACET_MODELS:
+            raise NotFound
+        return ct_model
+
+    def get_export_name(self):
+        return self.get_ct_model() or self.export_name
+
+    def get_export_kwargs(self):
+        return {'ct_model': self.get_ct_model()}
+
+
+class OrderExportAPIView(ExportAPIView):
+
+    export_name = 'orders'
+    export_stream = staticmethod(export_orders)
@@ -0,0 +1,26 @@
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+
+from ..models import Category
+from ..utils import get_catalog_etag
+
+
+class ConditionalGetAPIMixin:
+
+    def get(self, request, *args, **kwargs):
+        version = Category.objects.get_catalog_version()
+        if version['last_modified'] is None:
+            return self.get_fresh_response(request, *args, **kwargs)
+        etag = get_catalog_etag(request, version, request.META.get('HTTP_ACCEPT', ''))
+        last_modified = int(version['last_modified'].timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = self.get_fresh_response(request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = etag
+                response['Last-Modified'] = http_date(last_modified)
+        patch_vary_headers(response, ('Accept',))
+        return response
+
+    def get_fresh_response(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
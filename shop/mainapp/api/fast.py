@@ -0,0 +1,132 @@
+from decimal import Decimal
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils.encoding import filepath_to_uri
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            return orjson.dumps(data, default=self.encoder_class().default)
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+def decimal_converter(field):
+    if field.localize or field.normalize_output or field.decimal_places is None:
+        return lambda value, request: field.to_representation(value)
+    quantum = Decimal(1).scaleb(-field.decimal_places)
+    if getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING):
+        return lambda value, request: '' if value is None else '{:f}'.format(value.quantize(quantum))
+    return lambda value, request: None if value is None else value.quantize(quantum)
+
+
+def file_converter(field):
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda value, request: value or None
+    if not isinstance(default_storage, FileSystemStorage):
+        return lambda value, request: (
+            request.build_absolute_uri(default_storage.url(value)) if value and request else value or None
+        )
+    media_url = settings.MEDIA_URL
+
+    def convert(value, request):
+        if not value:
+            return None
+        url = media_url + filepath_to_uri(value)
+        return request.build_absolute_uri(url) if request else url
+    return convert
+
+
+def text_converter(field):
+    return lambda value, request: None if value is None else str(value)
+
+
+def identity_converter(field):
+    return lambda value, request: value
+
+
+def generic_converter(field):
+    return lambda value, request: None if value is None else field.to_representation(value)
+
+
+FIELD_CONVERTERS = (
+    (serializers.DecimalField, decimal_converter),
+    (serializers.FileField, file_converter),
+    (serializers.ChoiceField, identity_converter),
+    (serializers.BooleanField, identity_converter),
+    (serializers.IntegerField, identity_converter),
+    (serializers.PrimaryKeyRelatedField, identity_converter),
+    (serializers.CharField, text_converter)
+)
+
+
+class RowSerializer:
+
+    def __init__(self, serializer_class):
+        model = serializer_class.Meta.model
+        self.columns = []
+        self.value_fields = []
+        for name, field in serializer_class().fields.items():
+            model_field = model._meta.get_field(field.source)
+            for field_class, converter in FIELD_CONVERTERS:
+                if isinstance(field, field_class):
+                    break
+            else:
+                converter = generic_converter
+            self.columns.append((name, model_field.attname, converter(field)))
+            self.value_fields.append(model_field.attname)
+
+    def to_representation(self, row, request):
+        return {name: convert(row[attname], request) for name, attname, convert in self.columns}
+
+    def serialize(self, rows, request):
+        columns = self.columns
+        return [
+            {name: convert(row[attname], request) for name, attname, convert in columns}
+            for row in rows
+        ]
+
+
+@lru_cache(maxsize=None)
+def get_row_serializer(serializer_class):
+    return RowSerializer(serializer_class)
+
+
+class FastReadMixin:
+
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+
+    def get_row_serializer(self):
+        return get_row_serializer(self.get_serializer_class())
+
+    def list(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        rows = self.filter_queryset(self.get_queryset()).values(*row_serializer.value_fields)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.serialize(page, request))
+        return Response(row_serializer.serialize(rows, request))
+
+    def retrieve(self, request, *args, **kwargs):
+        row_serializer = self.get_row_serializer()
+        rows = self.filter_queryset(self.get_queryset()).values(*row_serializer.value_fields)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(rows, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(row_serializer.to_representation(row, request))
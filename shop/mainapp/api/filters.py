@@ -0,0 +1,10 @@
+from rest_framework.filters import BaseFilterBackend
+
+from ..facets import get_facet_index, filter_by_facets
+
+
+class FacetFilterBackend(BaseFilterBackend):
+
+    def filter_queryset(self, request, queryset, view):
+        selected = get_facet_index(queryset.model).get_selected(request.query_params)
+        return filter_by_facets(queryset, selected)
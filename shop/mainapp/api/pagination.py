@@ -0,0 +1,109 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    ordering_query_param = 'ordering'
+    count_query_param = 'count'
+    orderings = {
+        'id': ('id',),
+        '-id': ('-id',),
+        'price': ('price', 'id'),
+        '-price': ('-price', '-id')
+    }
+    default_ordering = 'id'
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering_name = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if self.ordering_name not in self.orderings:
+            self.ordering_name = self.default_ordering
+        self.ordering = self.orderings[self.ordering_name]
+        self.limit = self.get_page_size(request)
+        self.count = queryset.count() if self.include_count(request) else None
+
+        cursor = self.decode_cursor(request, queryset.model)
+        if cursor is not None:
+            queryset = queryset.filter(self.get_keyset_filter(cursor))
+        rows = list(queryset.order_by(*self.ordering)[:self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        rows = rows[:self.limit]
+        self.next_position = [self.get_row_value(rows[-1], field) for field in self.ordering] if self.has_next else None
+        return rows
+
+    def get_paginated_response(self, data):
+        response = [('next', self.get_next_link())]
+        if self.count is not None:
+            response.append(('count', self.count))
+        response.append(('items', data))
+        return Response(OrderedDict(response))
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def include_count(self, request):
+        return request.query_params.get(self.count_query_param, '').lower() in ('1', 'true', 'yes')
+
+    def get_keyset_filter(self, position):
+        keyset = Q()
+        equal = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = '{}__lt'.format(name) if field.startswith('-') else '{}__gt'.format(name)
+            keyset |= equal & Q(**{lookup: value})
+            equal &= Q(**{name: value})
+        return keyset
+
+    @staticmethod
+    def get_row_value(row, field):
+        name = field.lstrip('-')
+        value = row[name] if isinstance(row, dict) else getattr(row, name)
+        return str(value)
+
+    def decode_cursor(self, request, model):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            ordering_name, position = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            if ordering_name != self.ordering_name or not isinstance(position, list):
+                raise ValueError
+            if len(position) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError, UnicodeEncodeError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position):
+        return urlsafe_b64encode(json.dumps([self.ordering_name, position]).encode('utf-8')).decode('ascii')
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(self.next_position))
+
+    def get_schema_operation_parameters(self, view):
+        return []
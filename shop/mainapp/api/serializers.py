@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from ..models import Category, Smartphones, Bricks, BuildingBlocks, Customer, Order
+from ..models import Category, Smartphones, Bricks, BuildingBlocks, Customer, Order, ProductIndex
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -79,6 +79,17 @@ class BuildingBlockSerializer(BaseProductSerializer, serializers.ModelSerializer
         fields = '__all__'
 
 
+class ProductIndexSerializer(serializers.ModelSerializer):
+
+    url = serializers.CharField(source='get_absolute_url', read_only=True)
+
+    class Meta:
+        model = ProductIndex
+        fields = [
+            'ct_model', 'object_id', 'category', 'title', 'slug', 'image', 'price', 'url'
+        ]
+
+
 class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
@@ -88,6 +99,15 @@ class OrderSerializer(serializers.ModelSerializer):
 
 class CustomerSerializer(serializers.ModelSerializer):
 
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = Customer
+        exclude = ['orders']
+
+
+class CustomerWithOrdersSerializer(CustomerSerializer):
+
     orders = OrderSerializer(many=True)
 
     class Meta:
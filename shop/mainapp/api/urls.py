@@ -8,7 +8,12 @@ from .api_views import (
     BrickListAPIView,
     BrickDetailAPIView,
     BuildingBlockListAPIView,
-    BuildingBlockDetailAPIView
+    BuildingBlockDetailAPIView,
+    ProductSearchAPIView,
+    ProductFacetsAPIView,
+    CacheStatsAPIView,
+    ProductExportAPIView,
+    OrderExportAPIView
 )
 
 
@@ -20,5 +25,10 @@ urlpatterns = [
     path('bricks/<str:id>/', BrickDetailAPIView.as_view(), name='brick_detail'),
     path('buildingblocks/', BuildingBlockListAPIView.as_view(), name='buildingblock_list'),
     path('buildingblocks/<str:id>/', BuildingBlockDetailAPIView.as_view(), name='buildingblock_detail'),
-    path('customers/', CustomerAPIView.as_view(), name='customers_list')
+    path('customers/', CustomerAPIView.as_view(), name='customers_list'),
+    path('search/', ProductSearchAPIView.as_view(), name='product_search'),
+    path('facets/<str:ct_model>/', ProductFacetsAPIView.as_view(), name='product_facets'),
+    path('cache-stats/', CacheStatsAPIView.as_view(), name='cache_stats'),
+    path('export/products/', ProductExportAPIView.as_view(), name='export_products'),
+    path('export/orders/', OrderExportAPIView.as_view(), name='export_orders')
 ]
@@ -0,0 +1,129 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import Http404, HttpResponseNotAllowed
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+
+from .facets import filter_by_facets, get_facet_index
+from .models import Category, LatestProducts
+from .views import BaseView, CategoryDetailView, ProductDetailView
+
+
+def read_only(func):
+
+    def run(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(run, thread_sensitive=False)
+
+
+def catalog_view(func):
+
+    @wraps(func)
+    async def view(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return HttpResponseNotAllowed(['GET', 'HEAD'])
+        return await func(request, *args, **kwargs)
+
+    return view
+
+
+def async_api_view(view_class):
+    view = view_class.as_view()
+
+    def render(request, *args, **kwargs):
+        return view(request, *args, **kwargs).render()
+
+    render = read_only(render)
+
+    async def api_view(request, *args, **kwargs):
+        return await render(request, *args, **kwargs)
+
+    api_view.csrf_exempt = True
+    return api_view
+
+
+def render_page(view, request, template_name, context):
+    response = view.store_page_response(TemplateResponse(request, template_name, context))
+    return response.render()
+
+
+async def render_catalog_page(view, request, template_name, get_context):
+    response = await read_only(view.get_cached_response)(request)
+    if response is None:
+        context = await get_context()
+        response = await read_only(render_page)(view, request, template_name, context)
+    return view.finalize_page_response(response)
+
+
+def get_sidebar():
+    return read_only(Category.objects.get_categories_for_left_sidebar)()
+
+
+@catalog_view
+async def base_view(request):
+    view = BaseView()
+    view.setup(request)
+
+    async def get_context():
+        categories, products, cart = await asyncio.gather(
+            get_sidebar(),
+            read_only(LatestProducts.objects.get_products_for_main_page)('bricks', 'buildingblocks', 'smartphones'),
+            read_only(view.get_cart)(request)
+        )
+        return {'categories': categories, 'products': products, 'cart': cart}
+
+    return await render_catalog_page(view, request, 'base.html', get_context)
+
+
+@catalog_view
+async def category_detail_view(request, slug):
+    model = CategoryDetailView.CATEGORY_SLUG2PRODUCT_MODEL.get(slug)
+    if model is None:
+        raise Http404
+    view = CategoryDetailView()
+    view.setup(request, slug=slug)
+
+    async def get_context():
+        category, categories, facet_index, cart = await asyncio.gather(
+            read_only(get_object_or_404)(Category, slug=slug),
+            get_sidebar(),
+            read_only(get_facet_index)(model),
+            read_only(view.get_cart)(request)
+        )
+        selected = facet_index.get_selected(request.GET)
+        return {
+            'object': category,
+            'category': category,
+            'categories': categories,
+            'category_products': filter_by_facets(model.objects.all(), selected),
+            'facets': facet_index.get_counts(selected),
+            'cart': cart
+        }
+
+    return await render_catalog_page(view, request, CategoryDetailView.template_name, get_context)
+
+
+@catalog_view
+async def product_detail_view(request, ct_model, slug):
+    model = ProductDetailView.CT_MODEL_MODEL_CLASS.get(ct_model)
+    if model is None:
+        raise Http404
+    view = ProductDetailView()
+    view.setup(request, ct_model=ct_model, slug=slug)
+
+    async def get_context():
+        product, categories, cart = await asyncio.gather(
+            read_only(get_object_or_404)(model._base_manager.select_related('category'), slug=slug),
+            get_sidebar(),
+            read_only(view.get_cart)(request)
+        )
+        return {'object': product, 'product': product, 'ct_model': ct_model, 'categories': categories, 'cart': cart}
+
+    return await render_catalog_page(view, request, ProductDetailView.template_name, get_context)
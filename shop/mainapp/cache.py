@@ -0,0 +1,220 @@
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+
+
+MISSING = object()
+
+
+class LocalLRU:
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return MISSING
+            value, size, expires = entry
+            if expires < time.monotonic():
+                self._pop(key)
+                return MISSING
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, size, timeout):
+        if size > self.max_bytes:
+            return
+        with self.lock:
+            self._pop(key)
+            self.entries[key] = (value, size, time.monotonic() + timeout)
+            self.bytes += size
+            while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._pop(next(iter(self.entries)))
+
+    def delete(self, key):
+        with self.lock:
+            self._pop(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+
+    def _pop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+
+class TwoTierCache:
+
+    KEY = 'mainapp:{}:{}:{}'
+    LOCK_STRIPES = 64
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+        self.local = LocalLRU(settings.LOCAL_CACHE_MAX_ENTRIES, settings.LOCAL_CACHE_MAX_BYTES)
+        self.versions = {}
+        self.stamp = None
+        self.locks = [threading.Lock() for _ in range(self.LOCK_STRIPES)]
+        self.stats = dict.fromkeys(('local_hits', 'shared_hits', 'misses', 'computes', 'lock_waits'), 0)
+        self.stats_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        return caches[self.alias]
+
+    def get_versions(self, namespaces):
+        now = time.monotonic()
+        stamp = self.get_stamp()
+        if stamp != self.stamp:
+            self.versions.clear()
+            self.stamp = stamp
+        versions, stale = {}, []
+        for namespace in namespaces:
+            cached = self.versions.get(namespace)
+            if cached is not None and cached[1] > now:
+                versions[namespace] = cached[0]
+            else:
+                stale.append(namespace)
+        if stale:
+            found = self.get_version_model().objects.get_versions(stale)
+            for namespace in stale:
+                versions[namespace] = found.get(namespace, 0)
+                self.versions[namespace] = (versions[namespace], now + settings.CACHE_VERSION_TTL)
+        return [versions[namespace] for namespace in namespaces]
+
+    def get_version(self, namespace):
+        return self.get_versions([namespace])[0]
+
+    def bump(self, *namespaces):
+        namespaces = sorted(set(namespaces))
+        model = self.get_version_model()
+        versions = model.objects.bump(namespaces)
+        expires = time.monotonic() + settings.CACHE_VERSION_TTL
+        for namespace in namespaces:
+            self.versions[namespace] = (versions[namespace], expires)
+        transaction.on_commit(self.touch_stamp, using=router.db_for_write(model))
+
+    @staticmethod
+    def get_stamp():
+        try:
+            return os.stat(settings.CACHE_VERSION_STAMP).st_mtime_ns
+        except OSError:
+            return None
+
+    @staticmethod
+    def touch_stamp():
+        with open(settings.CACHE_VERSION_STAMP, 'a'):
+            pass
+        now = time.time_ns()
+        os.utime(settings.CACHE_VERSION_STAMP, ns=(now, now))
+
+    @staticmethod
+    def get_version_model():
+        return apps.get_model('mainapp', 'CacheNamespace')
+
+    def make_key(self, namespace, key):
+        return self.KEY.format(namespace, self.get_version(namespace), key)
+
+    def get(self, namespace, key, default=None):
+        value = self._get(self.make_key(namespace, key))
+        if value is MISSING:
+            self.count('misses')
+            return default
+        return value
+
+    def set(self, namespace, key, value, timeout=None):
+        self._set(self.make_key(namespace, key), value, timeout)
+
+    def get_or_set(self, namespace, key, compute, timeout=None):
+        full_key = self.make_key(namespace, key)
+        value = self._get(full_key)
+        if value is not MISSING:
+            return value
+        with self.locks[hash(full_key) % self.LOCK_STRIPES]:
+            value = self._get(full_key)
+            if value is not MISSING:
+                return value
+            self.count('misses')
+            lock_key = full_key + ':lock'
+            deadline = time.monotonic() + settings.CACHE_LOCK_TIMEOUT
+            while not self.shared.add(lock_key, 1, settings.CACHE_LOCK_TIMEOUT):
+                if time.monotonic() >= deadline:
+                    break
+                self.count('lock_waits')
+                time.sleep(0.05)
+                value = self._get(full_key)
+                if value is not MISSING:
+                    return value
+            try:
+                value = compute()
+                self.count('computes')
+                self._set(full_key, value, timeout)
+            finally:
+                self.shared.delete(lock_key)
+        return value
+
+    def incr(self, key, delta=1):
+        try:
+            return self.shared.incr(key, delta)
+        except ValueError:
+            if self.shared.add(key, delta, None):
+                return delta
+            return self.shared.incr(key, delta)
+
+    def count(self, name):
+        with self.stats_lock:
+            self.stats[name] += 1
+
+    def get_stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats)
+        requests = stats['local_hits'] + stats['shared_hits'] + stats['misses']
+        hits = stats['local_hits'] + stats['shared_hits']
+        return dict(
+            stats,
+            hit_rate=hits / requests if requests else 0,
+            local_entries=len(self.local.entries),
+            local_bytes=self.local.bytes
+        )
+
+    def clear_local(self):
+        self.local.clear()
+        self.versions.clear()
+        self.stamp = None
+
+    def _get(self, full_key):
+        value = self.local.get(full_key)
+        if value is not MISSING:
+            self.count('local_hits')
+            return value
+        data = self.shared.get(full_key)
+        if data is None:
+            return MISSING
+        self.count('shared_hits')
+        value = pickle.loads(data)
+        self.local.set(full_key, value, len(data), settings.LOCAL_CACHE_TIMEOUT)
+        return value
+
+    def _set(self, full_key, value, timeout):
+        data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        self.shared.set(full_key, data, timeout)
+        local_timeout = settings.LOCAL_CACHE_TIMEOUT if timeout is None else min(timeout, settings.LOCAL_CACHE_TIMEOUT)
+        self.local.set(full_key, value, len(data), local_timeout)
+
+
+catalog_cache = TwoTierCache()
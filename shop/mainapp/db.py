@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+PRIMARY_DB = 'default'
+REPLICA_DB = 'replica'
+
+
+@receiver(connection_created)
+def configure_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    read_only = connection.alias != PRIMARY_DB
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS:
+            if read_only and name == 'journal_mode':
+                continue
+            cursor.execute('PRAGMA {} = {}'.format(name, value))
+
+
+class PrimaryReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        if REPLICA_DB not in connections.databases or connections[PRIMARY_DB].in_atomic_block:
+            return PRIMARY_DB
+        return REPLICA_DB
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_DB
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == PRIMARY_DB
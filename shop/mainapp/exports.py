@@ -0,0 +1,106 @@
+import csv
+import zlib
+from io import StringIO
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .facets import FACET_MODELS
+from .models import Order
+
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson'
+}
+
+ORDER_EXPORT_FIELDS = (
+    'id', 'customer_id', 'customer__user__username', 'first_name', 'last_name', 'phone', 'address', 'status',
+    'buying_type', 'comment', 'created_at', 'order_date', 'cart_id', 'cart__total_products', 'cart__final_price'
+)
+
+
+def get_product_models(ct_model=None):
+    if ct_model is None:
+        return list(FACET_MODELS.values())
+    return [FACET_MODELS[ct_model]]
+
+
+def get_product_columns(product_models):
+    columns = ['model']
+    for model in product_models:
+        for field in model._meta.concrete_fields:
+            if field.attname not in columns:
+                columns.append(field.attname)
+    return columns
+
+
+def iter_product_rows(product_models):
+    for model in product_models:
+        fields = [field.attname for field in model._meta.concrete_fields]
+        ct_model = model._meta.model_name
+        queryset = model._base_manager.order_by('id').values(*fields)
+        for row in queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            row['model'] = ct_model
+            yield row
+
+
+def iter_order_rows():
+    queryset = Order.objects.order_by('id').values(*ORDER_EXPORT_FIELDS)
+    return queryset.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def stream_csv(columns, rows):
+    buffer = StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= EXPORT_BUFFER_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def stream_ndjson(columns, rows):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    chunk = []
+    size = 0
+    for row in rows:
+        line = encoder.encode({column: row.get(column) for column in columns if column in row}) + '\n'
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    yield ''.join(chunk)
+
+
+def stream_export(columns, rows, export_format, compress=False):
+    stream = stream_csv if export_format == 'csv' else stream_ndjson
+    chunks = (chunk.encode('utf-8') for chunk in stream(columns, rows))
+    if compress:
+        return stream_gzip(chunks)
+    return chunks
+
+
+def stream_gzip(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_products(ct_model=None, export_format='csv', compress=False):
+    product_models = get_product_models(ct_model)
+    return stream_export(get_product_columns(product_models), iter_product_rows(product_models), export_format, compress)
+
+
+def export_orders(export_format='csv', compress=False):
+    return stream_export(list(ORDER_EXPORT_FIELDS), iter_order_rows(), export_format, compress)
@@ -0,0 +1,104 @@
+from .cache import catalog_cache
+from .models import Bricks, BuildingBlocks, Smartphones
+
+
+FACET_FIELDS = {
+    'bricks': ('factory', 'type', 'voidness', 'surface', 'colour', 'frost_resistance', 'warehouse'),
+    'buildingblocks': ('factory', 'type', 'colour', 'frost_resistance', 'density', 'warehouse'),
+    'smartphones': ('diagonal', 'colour')
+}
+
+FACET_MODELS = {
+    'bricks': Bricks,
+    'buildingblocks': BuildingBlocks,
+    'smartphones': Smartphones
+}
+
+FACET_INDEX_NAMESPACE = 'facets:{}'
+
+
+def bit_count(bitmap):
+    return bin(bitmap).count('1')
+
+
+if hasattr(int, 'bit_count'):
+    bit_count = int.bit_count  # noqa: F811
+
+
+class FacetIndex:
+
+    def __init__(self, ct_model, fields, bitmaps, all_products):
+        self.ct_model = ct_model
+        self.fields = fields
+        self.bitmaps = bitmaps
+        self.all_products = all_products
+
+    @classmethod
+    def build(cls, model):
+        fields = FACET_FIELDS[model._meta.model_name]
+        bitmaps = {field: {} for field in fields}
+        position = -1
+        for position, row in enumerate(model._base_manager.order_by('id').values_list(*fields).iterator()):
+            bit = 1 << position
+            for field, value in zip(fields, row):
+                bitmaps[field][value] = bitmaps[field].get(value, 0) | bit
+        return cls(model._meta.model_name, fields, bitmaps, (1 << (position + 1)) - 1)
+
+    def get_selected(self, query_params):
+        selected = {}
+        for field in self.fields:
+            values = [value for value in query_params.getlist(field) if value in self.bitmaps[field]]
+            if values:
+                selected[field] = values
+        return selected
+
+    def match(self, selected, exclude=None):
+        bitmap = self.all_products
+        for field, values in selected.items():
+            if field == exclude:
+                continue
+            field_bitmap = 0
+            for value in values:
+                field_bitmap |= self.bitmaps[field][value]
+            bitmap &= field_bitmap
+        return bitmap
+
+    def get_counts(self, selected):
+        model = FACET_MODELS[self.ct_model]
+        facets = []
+        for field in self.fields:
+            model_field = model._meta.get_field(field)
+            labels = dict(model_field.flatchoices)
+            base = self.match(selected, exclude=field)
+            values = [
+                {
+                    'value': value,
+                    'label': labels.get(value, value),
+                    'count': bit_count(base & bitmap),
+                    'selected': value in selected.get(field, ())
+                }
+                for value, bitmap in sorted(self.bitmaps[field].items())
+            ]
+            facets.append({'field': field, 'label': model_field.verbose_name, 'values': values})
+        return facets
+
+    def get_total(self, selected):
+        return bit_count(self.match(selected))
+
+
+def get_facet_index(model):
+    return catalog_cache.get_or_set(get_facet_namespace(model), 'index', lambda: FacetIndex.build(model))
+
+
+def get_facet_namespace(model):
+    return FACET_INDEX_NAMESPACE.format(model._meta.model_name)
+
+
+def invalidate_facet_index(model):
+    catalog_cache.bump(get_facet_namespace(model))
+
+
+def filter_by_facets(queryset, selected):
+    for field, values in selected.items():
+        queryset = queryset.filter(**{'{}__in'.format(field): values})
+    return queryset
@@ -0,0 +1,28 @@
+import re
+
+from django.template.loader import render_to_string
+
+
+FRAGMENT_TEMPLATES = {
+    'cart_badge': 'fragments/cart_badge.html',
+    'messages': 'fragments/messages.html'
+}
+
+FRAGMENT_MARKER = '<!--fragment:{}-->'
+FRAGMENT_RE = re.compile(rb'<!--fragment:(\w+)-->')
+
+
+def render_fragment(name, context):
+    return render_to_string(FRAGMENT_TEMPLATES[name], context)
+
+
+def fill_fragments(content, context):
+    rendered = {}
+
+    def replace(match):
+        name = match.group(1).decode()
+        if name not in rendered:
+            rendered[name] = render_fragment(name, context).encode()
+        return rendered[name]
+
+    return FRAGMENT_RE.sub(replace, content)
@@ -0,0 +1,134 @@
+import hashlib
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from PIL import Image
+
+
+BACKGROUND_PATH = os.path.join(settings.MEDIA_ROOT, 'base', 'white_background.png')
+JPEG_QUALITY = 95
+RESIZED_QUALITY = 85
+
+RESIZED_FORMATS = {
+    'jpeg': ('JPEG', 'image/jpeg'),
+    'webp': ('WEBP', 'image/webp')
+}
+
+resized_cache_usage = {'bytes': None}
+resized_cache_lock = threading.Lock()
+
+
+def get_image_hash(file):
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(65536), b''):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def get_background(path):
+    background = Image.open(path)
+    background.load()
+    return background.convert("RGB")
+
+
+def render_product_image(data, max_resolution, background_path=BACKGROUND_PATH):
+    img = Image.open(BytesIO(data))
+    max_height, max_width = max_resolution
+    if img.width > img.height:
+        width_new = max_width
+        height_new = (max_width * img.height) // img.width
+    else:
+        width_new = (max_height * img.width) // img.height
+        height_new = max_height
+    resized_img = img.convert("RGB").resize((width_new, height_new))
+
+    background = get_background(background_path).copy()
+    background.paste(resized_img, ((background.width - width_new) // 2, (background.height - height_new) // 2))
+
+    filestream = BytesIO()
+    background.save(filestream, 'JPEG', quality=JPEG_QUALITY)
+    return filestream.getvalue()
+
+
+@lru_cache(maxsize=4096)
+def get_source_hash(path, mtime_ns, size):
+    with open(path, 'rb') as source:
+        return get_image_hash(source)
+
+
+def get_image_version(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return get_source_hash(path, stat.st_mtime_ns, stat.st_size)[:12]
+
+
+def get_resized_image(path, width, height, image_format='jpeg'):
+    stat = os.stat(path)
+    source_hash = get_source_hash(path, stat.st_mtime_ns, stat.st_size)
+    cache_dir = os.path.join(settings.RESIZED_IMAGE_CACHE_DIR, source_hash[:2])
+    cache_path = os.path.join(cache_dir, '{}_{}x{}.{}'.format(source_hash, width, height, image_format))
+    try:
+        os.utime(cache_path)
+        return cache_path
+    except FileNotFoundError:
+        pass
+
+    img = Image.open(path)
+    img.thumbnail((width, height), Image.LANCZOS)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+    with os.fdopen(fd, 'wb') as tmp:
+        img.convert('RGB').save(tmp, RESIZED_FORMATS[image_format][0], quality=RESIZED_QUALITY)
+    os.replace(tmp_path, cache_path)
+    track_resized_image(os.path.getsize(cache_path))
+    return cache_path
+
+
+def track_resized_image(size):
+    with resized_cache_lock:
+        if resized_cache_usage['bytes'] is None:
+            resized_cache_usage['bytes'] = scan_resized_images(settings.RESIZED_IMAGE_CACHE_DIR)[1]
+        else:
+            resized_cache_usage['bytes'] += size
+        if resized_cache_usage['bytes'] > settings.RESIZED_IMAGE_CACHE_MAX_BYTES:
+            resized_cache_usage['bytes'] = evict_resized_images(
+                settings.RESIZED_IMAGE_CACHE_DIR, settings.RESIZED_IMAGE_CACHE_MAX_BYTES
+            )
+
+
+def scan_resized_images(cache_dir):
+    entries = []
+    total = 0
+    for subdir in os.scandir(cache_dir):
+        if not subdir.is_dir():
+            continue
+        for entry in os.scandir(subdir.path):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+            total += stat.st_size
+    return entries, total
+
+
+def evict_resized_images(cache_dir, max_bytes):
+    entries, total = scan_resized_images(cache_dir)
+    if total <= max_bytes:
+        return total
+    entries.sort()
+    for mtime, size, path in entries:
+        if total <= max_bytes * 0.9:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
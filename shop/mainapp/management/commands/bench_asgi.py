@@ -0,0 +1,103 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import cycle, islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from mainapp.models import Bricks
+
+BENCH_MODES = {
+    'wsgi': 'shop.urls',
+    'asgi-sync': 'shop.urls',
+    'asgi': 'shop.asgi_urls'
+}
+
+
+class HostAsyncClient(AsyncClient):
+
+    def __init__(self, host, **defaults):
+        super().__init__(**defaults)
+        self.host = host.encode('ascii')
+
+    def _base_scope(self, **request):
+        scope = super()._base_scope(**request)
+        scope['headers'] = [
+            (name, self.host if name == b'host' else value) for name, value in scope['headers']
+        ]
+        return scope
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает пропускную способность синхронного (WSGI) и асинхронного (ASGI) пути чтения каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', action='append', dest='paths', help='Адрес для запросов (можно несколько)')
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--concurrency', type=int, default=50)
+        parser.add_argument('--host', default='localhost', help='Значение заголовка Host')
+        parser.add_argument('--mode', action='append', dest='modes', choices=sorted(BENCH_MODES))
+        parser.add_argument(
+            '--bust-cache', action='store_true', help='Добавлять к адресам уникальный параметр, минуя кэш страниц'
+        )
+
+    def handle(self, *args, **options):
+        self.host = options['host']
+        paths = list(islice(cycle(options['paths'] or self.get_default_paths()), options['requests']))
+        if options['bust_cache']:
+            paths = ['{}{}_bench={}'.format(path, '&' if '?' in path else '?', i) for i, path in enumerate(paths)]
+        for mode in options['modes'] or list(BENCH_MODES):
+            with override_settings(ROOT_URLCONF=BENCH_MODES[mode]):
+                started = time.perf_counter()
+                if mode == 'wsgi':
+                    results = self.run_threads(paths, options['concurrency'])
+                else:
+                    results = asyncio.run(self.run_async(paths, options['concurrency']))
+                elapsed = time.perf_counter() - started
+            self.report(mode, results, elapsed)
+
+    @staticmethod
+    def get_default_paths():
+        product = Bricks.objects.order_by('id').first()
+        if product is None:
+            raise CommandError('В каталоге нет товаров, укажите адреса через --path или заполните базу')
+        return [
+            reverse('base'),
+            product.get_absolute_url(),
+            reverse('brick_list'),
+            reverse('brick_detail', kwargs={'id': product.id})
+        ]
+
+    @staticmethod
+    def timed_get(client, path):
+        started = time.perf_counter()
+        response = client.get(path)
+        return response.status_code, time.perf_counter() - started
+
+    def run_threads(self, paths, concurrency):
+        with ThreadPoolExecutor(concurrency) as executor:
+            return list(executor.map(lambda path: self.timed_get(Client(HTTP_HOST=self.host), path), paths))
+
+    async def run_async(self, paths, concurrency):
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(path):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await HostAsyncClient(self.host).get(path)
+                return response.status_code, time.perf_counter() - started
+
+        return await asyncio.gather(*(fetch(path) for path in paths))
+
+    def report(self, mode, results, elapsed):
+        latencies = sorted(latency for _, latency in results)
+        errors = sum(1 for status, _ in results if status >= 400)
+        self.stdout.write('{:<10} {:>8.1f} запр/с  p50 {:>7.1f} мс  p95 {:>7.1f} мс  ошибок: {}'.format(
+            mode, len(results) / elapsed,
+            latencies[len(latencies) // 2] * 1000,
+            latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000,
+            errors
+        ))
@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory
+
+from mainapp.api.fast import FastJSONRenderer, get_row_serializer
+from mainapp.api.serializers import BrickSerializer, BuildingBlockSerializer, SmartphoneSerializer
+
+
+BENCH_SERIALIZERS = {
+    'bricks': BrickSerializer,
+    'buildingblocks': BuildingBlockSerializer,
+    'smartphones': SmartphoneSerializer
+}
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает скорость ModelSerializer и быстрого построчного сериализатора API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=sorted(BENCH_SERIALIZERS), default='bricks')
+        parser.add_argument('--rows', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=3)
+        parser.add_argument('--host', default='localhost', help='Значение заголовка Host для ссылок на изображения')
+
+    def handle(self, *args, **options):
+        serializer_class = BENCH_SERIALIZERS[options['model']]
+        model = serializer_class.Meta.model
+        request = APIRequestFactory().get('/api/{}/'.format(options['model']), HTTP_HOST=options['host'])
+        row_serializer = get_row_serializer(serializer_class)
+        queryset = model._base_manager.order_by('id')[:options['rows']]
+
+        def model_serializer():
+            return serializer_class(list(queryset), many=True, context={'request': request}).data
+
+        def row_serializer_path():
+            return row_serializer.serialize(list(queryset.values(*row_serializer.value_fields)), request)
+
+        model_data = model_serializer()
+        fast_data = row_serializer_path()
+        if [dict(item) for item in model_data] != fast_data:
+            self.stderr.write(self.style.WARNING('Результаты сериализаторов различаются!'))
+        rows = len(fast_data)
+        if not rows:
+            self.stdout.write('Нет данных для замера')
+            return
+
+        results = [
+            ('ModelSerializer', self.measure(model_serializer, options['repeat'])),
+            ('RowSerializer', self.measure(row_serializer_path, options['repeat'])),
+            ('JSONRenderer', self.measure(lambda: JSONRenderer().render(fast_data), options['repeat'])),
+            ('FastJSONRenderer', self.measure(lambda: FastJSONRenderer().render(fast_data), options['repeat']))
+        ]
+        for name, elapsed in results:
+            self.stdout.write('{:<18} {:>10.0f} строк/с ({:.1f} мс на {} строк)'.format(
+                name, rows / elapsed, elapsed * 1000, rows
+            ))
+        timings = dict(results)
+        self.stdout.write('Ускорение: сериализация {:.1f}x, рендеринг {:.1f}x, вместе {:.1f}x'.format(
+            timings['ModelSerializer'] / timings['RowSerializer'],
+            timings['JSONRenderer'] / timings['FastJSONRenderer'],
+            (timings['ModelSerializer'] + timings['JSONRenderer'])
+            / (timings['RowSerializer'] + timings['FastJSONRenderer'])
+        ))
+
+    @staticmethod
+    def measure(func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best
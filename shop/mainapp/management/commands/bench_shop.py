@@ -0,0 +1,279 @@
+import json
+import random
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+from django.utils import timezone
+
+from mainapp.facets import FACET_MODELS
+from mainapp.middleware import QueryRecorder
+from mainapp.models import Cart, CartProduct, Customer, Order
+
+
+API_NAMES = {
+    'bricks': ('brick_list', 'brick_detail'),
+    'buildingblocks': ('buildingblock_list', 'buildingblock_detail'),
+    'smartphones': ('smartphone_list', 'smartphone_detail')
+}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
+
+
+def get_git_revision():
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], cwd=settings.BASE_DIR, capture_output=True,
+            text=True, check=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, dirty
+
+
+class Command(BaseCommand):
+    help = ('Нагрузочный прогон всех адресов магазина и API в процессе: пропускная способность, '
+            'задержки p50/p95/p99 и SQL-запросы на запрос по каждому адресу')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sessions', type=int, default=100, help='Количество пользовательских сессий')
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--warmup', type=int, default=5, help='Сессий прогрева, не попадающих в замер')
+        parser.add_argument('--products', type=int, default=200, help='Размер выборки товаров каждого типа')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--host', default='localhost', help='Значение заголовка Host')
+        parser.add_argument('--admin-user', help='Пользователь с is_staff для адресов, требующих прав администратора')
+        parser.add_argument('--output', help='Сохранить результаты в JSON-файл')
+        parser.add_argument('--compare', help='JSON-файл предыдущего прогона для сравнения')
+
+    def handle(self, *args, **options):
+        self.host = options['host']
+        self.seed = options['seed']
+        rng = random.Random(self.seed)
+        self.products = self.get_products(rng, options['products'])
+        self.users = list(
+            get_user_model().objects.filter(
+                id__in=Customer.objects.values('user'), is_active=True
+            ).order_by('id')[:max(options['sessions'], 1)]
+        )
+        if not self.products or not self.users:
+            raise CommandError('Нет товаров или покупателей для замера, заполните базу командой seed_shop')
+        self.admin = None
+        if options['admin_user']:
+            self.admin = get_user_model().objects.filter(username=options['admin_user'], is_staff=True).first()
+            if self.admin is None:
+                raise CommandError('Пользователь {} не найден или не администратор'.format(options['admin_user']))
+
+        data = self.get_data_counts()
+        baseline = None
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            if baseline.get('data') != data:
+                raise CommandError(
+                    'Данные отличаются от базового прогона ({} вместо {}): оформление заказов меняет базу, '
+                    'восстановите её из снимка перед сравнением'.format(data, baseline.get('data'))
+                )
+
+        self.run(range(-options['warmup'], 0), options['concurrency'])
+        started = time.perf_counter()
+        results = self.run(range(options['sessions']), options['concurrency'])
+        elapsed = time.perf_counter() - started
+
+        report = self.get_report(results, elapsed, data, options)
+        self.print_report(report)
+        if baseline is not None:
+            self.print_comparison(baseline, report)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            self.stdout.write('Результаты сохранены в {}'.format(options['output']))
+
+    @staticmethod
+    def get_data_counts():
+        return {
+            'orders': Order.objects.count(),
+            'carts': Cart.objects.count(),
+            'cart_products': CartProduct.objects.count()
+        }
+
+    def get_products(self, rng, size):
+        products = []
+        for ct_model, model in sorted(FACET_MODELS.items()):
+            ids = list(model.objects.order_by('id').values_list('id', flat=True))
+            picked = rng.sample(ids, min(size, len(ids)))
+            for product in model.objects.select_related('category').filter(id__in=picked).order_by('id'):
+                products.append({
+                    'ct_model': ct_model,
+                    'id': product.id,
+                    'slug': product.slug,
+                    'word': product.title.split()[0],
+                    'image': product.image.name,
+                    'product_url': product.get_absolute_url(),
+                    'category_url': product.category.get_absolute_url()
+                })
+        return products
+
+    def get_session_steps(self, rng):
+        product, other = rng.sample(self.products, 2) if len(self.products) > 1 else self.products * 2
+        kwargs = {'ct_model': product['ct_model'], 'slug': product['slug']}
+        other_kwargs = {'ct_model': other['ct_model'], 'slug': other['slug']}
+        list_name, detail_name = API_NAMES[product['ct_model']]
+        steps = [
+            ('base', 'get', reverse('base'), None),
+            ('category_detail', 'get', product['category_url'], None),
+            ('product_detail', 'get', product['product_url'], None),
+            ('search', 'get', '{}?q={}'.format(reverse('search'), product['word']), None),
+            ('resized_image', 'get', reverse('resized_image', kwargs={
+                'width': 300, 'height': 300, 'path': product['image']
+            }), None),
+            ('add_to_cart', 'get', reverse('add_to_cart', kwargs=kwargs), None),
+            ('add_to_cart', 'get', reverse('add_to_cart', kwargs=other_kwargs), None),
+            ('cart', 'get', reverse('cart'), None),
+            ('change_qty', 'post', reverse('change_qty', kwargs=kwargs), {'qty': rng.randint(2, 5)}),
+            ('delete_from_cart', 'get', reverse('delete_from_cart', kwargs=other_kwargs), None),
+            ('checkout', 'get', reverse('checkout'), None),
+            ('make_order', 'post', reverse('make_order'), {
+                'first_name': 'Покупатель',
+                'last_name': 'Нагрузочный',
+                'phone': '+79000000000',
+                'address': 'ул. Тестовая, 1',
+                'buying_type': rng.choice([buying_type for buying_type, _ in Order.BUYING_TYPE_CHOICES]),
+                'order_date': (date.today() + timedelta(days=rng.randint(1, 14))).isoformat(),
+                'comment': ''
+            }),
+            ('categories_list', 'get', reverse('categories_list'), None),
+            (list_name, 'get', reverse(list_name), None),
+            (list_name, 'get', '{}?ordering=price'.format(reverse(list_name)), None),
+            (detail_name, 'get', reverse(detail_name, kwargs={'id': product['id']}), None),
+            ('product_search', 'get', '{}?q={}'.format(reverse('product_search'), product['word']), None),
+            ('product_facets', 'get', reverse('product_facets', kwargs={'ct_model': product['ct_model']}), None),
+            ('customers_list', 'get', reverse('customers_list'), None)
+        ]
+        if self.admin is not None:
+            steps.extend([
+                ('cache_stats', 'get', reverse('cache_stats'), None),
+                ('export_products', 'get', '{}?model={}'.format(reverse('export_products'), product['ct_model']), None),
+                ('export_orders', 'get', reverse('export_orders'), None)
+            ])
+        return steps
+
+    def run(self, sessions, concurrency):
+        with ThreadPoolExecutor(concurrency) as executor:
+            return [result for results in executor.map(self.run_session, sessions) for result in results]
+
+    def run_session(self, index):
+        rng = random.Random('{}:{}'.format(self.seed, index))
+        client = Client(HTTP_HOST=self.host, raise_request_exception=False)
+        admin_client = None
+        results = []
+        try:
+            client.force_login(self.users[index % len(self.users)])
+            if self.admin is not None:
+                admin_client = Client(HTTP_HOST=self.host, raise_request_exception=False)
+                admin_client.force_login(self.admin)
+            for name, method, path, data in self.get_session_steps(rng):
+                session_client = admin_client if name in ('cache_stats', 'export_products', 'export_orders') else client
+                results.append((name,) + self.request(session_client, method, path, data))
+        finally:
+            connections.close_all()
+        return results
+
+    @staticmethod
+    def request(client, method, path, data):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data)
+            if response.streaming:
+                b''.join(response.streaming_content)
+            latency = time.perf_counter() - started
+        return response.status_code, latency, recorder.count
+
+    def get_report(self, results, elapsed, data, options):
+        grouped = {}
+        for name, status, latency, queries in results:
+            grouped.setdefault(name, []).append((status, latency, queries))
+        busy = sum(latency for _, _, latency, _ in results)
+        commit, dirty = get_git_revision()
+        total = self.summarize([(status, latency, queries) for _, status, latency, queries in results], busy)
+        total['rps'] = round(len(results) / elapsed, 1) if elapsed else 0
+        return {
+            'commit': commit,
+            'dirty': dirty,
+            'created_at': timezone.now().isoformat(),
+            'options': {key: options[key] for key in ('sessions', 'concurrency', 'warmup', 'products', 'seed')},
+            'catalog': {ct_model: model.objects.count() for ct_model, model in sorted(FACET_MODELS.items())},
+            'data': data,
+            'elapsed': round(elapsed, 3),
+            'total': total,
+            'endpoints': {name: self.summarize(values, busy) for name, values in sorted(grouped.items())}
+        }
+
+    @staticmethod
+    def summarize(values, busy):
+        latencies = sorted(latency for _, latency, _ in values)
+        queries = [count for _, _, count in values]
+        return {
+            'requests': len(values),
+            'errors': sum(1 for status, _, _ in values if status >= 400),
+            'time_s': round(sum(latencies), 3),
+            'time_share': round(sum(latencies) / busy * 100, 1) if busy else 0,
+            'p50_ms': round(percentile(latencies, 0.5), 2),
+            'p95_ms': round(percentile(latencies, 0.95), 2),
+            'p99_ms': round(percentile(latencies, 0.99), 2),
+            'queries_avg': round(sum(queries) / len(queries), 2) if queries else 0,
+            'queries_max': max(queries, default=0)
+        }
+
+    def print_report(self, report):
+        self.stdout.write('Коммит: {}{}'.format(
+            report['commit'] or 'неизвестен', ' (есть изменения)' if report['dirty'] else ''
+        ))
+        self.stdout.write('{:<22} {:>7} {:>6} {:>8} {:>7} {:>9} {:>9} {:>9} {:>8} {:>6}'.format(
+            'адрес', 'запр.', 'ошиб.', 'время с', 'доля %', 'p50 мс', 'p95 мс', 'p99 мс', 'SQL ср.', 'макс.'
+        ))
+        for name, stats in list(report['endpoints'].items()) + [('ИТОГО', report['total'])]:
+            self.stdout.write(
+                '{:<22} {requests:>7} {errors:>6} {time_s:>8.2f} {time_share:>7.1f} {p50_ms:>9.2f} {p95_ms:>9.2f} '
+                '{p99_ms:>9.2f} {queries_avg:>8.2f} {queries_max:>6}'.format(name, **stats)
+            )
+        self.stdout.write('Пропускная способность: {:.1f} запр/с за {:.1f} с'.format(
+            report['total']['rps'], report['elapsed']
+        ))
+        if report['total']['errors']:
+            self.stdout.write(self.style.ERROR('Ошибочных ответов: {}'.format(report['total']['errors'])))
+
+    def print_comparison(self, baseline, report):
+        self.stdout.write('Сравнение с {}:'.format(baseline.get('commit') or 'предыдущим прогоном'))
+        rows = list(report['endpoints'].items()) + [('ИТОГО', report['total'])]
+        for name, stats in rows:
+            before = baseline['total'] if name == 'ИТОГО' else baseline['endpoints'].get(name)
+            if before is None:
+                self.stdout.write('{:<22} нет в базовом прогоне'.format(name))
+                continue
+            self.stdout.write('{:<22} p95 {:>9.2f} -> {:>9.2f} мс ({:+.1f}%)  SQL {:>6.2f} -> {:>6.2f}'.format(
+                name, before['p95_ms'], stats['p95_ms'], self.change(before['p95_ms'], stats['p95_ms']),
+                before['queries_avg'], stats['queries_avg']
+            ))
+
+    @staticmethod
+    def change(before, after):
+        return (after - before) / before * 100 if before else 0
@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from mainapp.db import PRIMARY_DB
+from mainapp.facets import FACET_MODELS
+from mainapp.models import Bricks, Cart, ProductIndex
+from mainapp.utils import CART_SESSION_KEY
+
+
+class Command(BaseCommand):
+    help = ('Замеряет задержки чтения каталога SQLite без нагрузки и под потоком изменений корзин '
+            '(добавление, изменение количества и удаление товара через представления)')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--duration', type=float, default=5.0, help='Длительность каждого замера, с')
+        parser.add_argument('--primary-reads', action='store_true', help='Читать через основное соединение')
+        parser.add_argument('--host', default='localhost', help='Значение заголовка Host')
+
+    def handle(self, *args, **options):
+        self.read_alias = PRIMARY_DB if options['primary_reads'] else None
+        self.host = options['host']
+        self.slugs = list(Bricks.objects.values_list('slug', flat=True)[:200])
+        if not self.slugs:
+            self.stdout.write('Нет товаров для замера')
+            return
+        self.cart_ids = []
+        failed = 0
+        try:
+            for label, writers in (('без записей', 0), ('с записями', options['writers'])):
+                reads, writes, errors = self.run(options['readers'], writers, options['duration'])
+                latencies = sorted(reads)
+                failed += errors
+                self.stdout.write(
+                    '{:<12} чтений: {:>6} ({:>7.0f}/с)  p50 {:>6.2f} мс  p95 {:>6.2f} мс  p99 {:>6.2f} мс  '
+                    'записей: {} ({:.0f}/с), ошибок: {}'.format(
+                        label, len(latencies), len(latencies) / options['duration'],
+                        self.percentile(latencies, 0.5), self.percentile(latencies, 0.95),
+                        self.percentile(latencies, 0.99), writes, writes / options['duration'], errors
+                    )
+                )
+        finally:
+            Cart.objects.filter(pk__in=[cart_id for cart_id in self.cart_ids if cart_id]).delete()
+        if failed:
+            raise CommandError('Ошибочных ответов при изменении корзин: {}'.format(failed))
+
+    def run(self, readers, writers, duration):
+        stop = threading.Event()
+        with ThreadPoolExecutor(readers + writers) as executor:
+            read_futures = [executor.submit(self.read_loop, stop, index) for index in range(readers)]
+            write_futures = [executor.submit(self.write_loop, stop, index) for index in range(writers)]
+            time.sleep(duration)
+            stop.set()
+            reads = [latency for future in read_futures for latency in future.result()]
+            results = [future.result() for future in write_futures]
+        return reads, sum(writes for writes, _ in results), sum(errors for _, errors in results)
+
+    def read_loop(self, stop, index):
+        latencies = []
+        try:
+            while not stop.is_set():
+                slug = self.slugs[(index + len(latencies)) % len(self.slugs)]
+                started = time.perf_counter()
+                list(self.using(ProductIndex.objects.filter(ct_model__in=list(FACET_MODELS))).order_by(
+                    '-created_at', '-object_id'
+                )[:15])
+                self.using(Bricks.objects.filter(slug=slug)).first()
+                latencies.append(time.perf_counter() - started)
+        finally:
+            connections.close_all()
+        return latencies
+
+    def write_loop(self, stop, index):
+        client = Client(HTTP_HOST=self.host, raise_request_exception=False)
+        writes = errors = 0
+        try:
+            while not stop.is_set():
+                kwargs = {'ct_model': 'bricks', 'slug': self.slugs[(index + writes) % len(self.slugs)]}
+                for method, path, data in (
+                    ('get', reverse('add_to_cart', kwargs=kwargs), None),
+                    ('post', reverse('change_qty', kwargs=kwargs), {'qty': 2 + writes % 3}),
+                    ('get', reverse('delete_from_cart', kwargs=kwargs), None)
+                ):
+                    response = getattr(client, method)(path, data)
+                    writes += 1
+                    if response.status_code >= 400:
+                        errors += 1
+        finally:
+            self.cart_ids.append((client.session.get(CART_SESSION_KEY) or {}).get('id'))
+            connections.close_all()
+        return writes, errors
+
+    def using(self, queryset):
+        return queryset.using(self.read_alias) if self.read_alias else queryset
+
+    @staticmethod
+    def percentile(values, fraction):
+        if not values:
+            return 0
+        return values[min(len(values) - 1, int(len(values) * fraction))] * 1000
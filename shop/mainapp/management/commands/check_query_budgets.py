@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+
+from mainapp.query_budget import QUERY_BUDGETS, assert_query_budget, get_budget_paths
+
+
+class Command(BaseCommand):
+    help = 'Проверяет, что страницы и API укладываются в бюджет SQL-запросов на запрос'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='localhost', help='Значение заголовка Host')
+
+    def handle(self, *args, **options):
+        paths, add_to_cart = get_budget_paths()
+        if add_to_cart is None:
+            raise CommandError('В каталоге нет товаров для проверки')
+
+        client = Client(HTTP_HOST=options['host'])
+        client.get(add_to_cart)
+        for path in paths.values():
+            client.get(path)
+
+        failures = []
+        for url_name, path in paths.items():
+            try:
+                count = assert_query_budget(client, url_name, path)
+            except AssertionError as e:
+                failures.append(url_name)
+                self.stdout.write(self.style.ERROR(str(e)))
+                continue
+            self.stdout.write('{:<22} {:>3} / {:<3} {}'.format(url_name, count, QUERY_BUDGETS[url_name], path))
+        if failures:
+            raise CommandError('Превышен бюджет запросов: {}'.format(', '.join(failures)))
+        self.stdout.write(self.style.SUCCESS('Все адреса укладываются в бюджет запросов'))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from mainapp.query_plans import explain_query_plan, get_full_scans, get_hot_queries
+
+
+class Command(BaseCommand):
+    help = 'Проверяет планы горячих запросов (EXPLAIN QUERY PLAN) и падает при полном сканировании таблицы'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help='Печатать план каждого запроса')
+
+    def handle(self, *args, **options):
+        failures = []
+        for name, queryset in get_hot_queries():
+            if connections[queryset.db].vendor != 'sqlite':
+                raise CommandError('Проверка планов поддерживается только для SQLite')
+            plan = explain_query_plan(queryset)
+            scans = get_full_scans(name, plan)
+            if scans:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR('{}: {}'.format(name, '; '.join(scans))))
+            elif options['verbose_plans']:
+                self.stdout.write('{}: {}'.format(name, '; '.join(plan)))
+            else:
+                self.stdout.write('{}: OK'.format(name))
+        if failures:
+            raise CommandError('Полное сканирование таблицы в запросах: {}'.format(', '.join(failures)))
+        self.stdout.write(self.style.SUCCESS('Все горячие запросы используют индексы'))
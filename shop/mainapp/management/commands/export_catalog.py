@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand
+
+from mainapp.exports import EXPORT_FORMATS, export_orders, export_products
+from mainapp.facets import FACET_MODELS
+
+
+class Command(BaseCommand):
+    help = 'Выгружает товары или заказы в CSV/NDJSON потоком, не загружая таблицы в память'
+
+    def add_arguments(self, parser):
+        parser.add_argument('source', choices=('products', 'orders'))
+        parser.add_argument('--model', choices=sorted(FACET_MODELS))
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv')
+        parser.add_argument('--gzip', action='store_true')
+        parser.add_argument('-o', '--output', help='Файл для записи, по умолчанию stdout')
+
+    def handle(self, *args, **options):
+        if options['source'] == 'products':
+            chunks = export_products(options['model'], options['format'], options['gzip'])
+        else:
+            chunks = export_orders(options['format'], options['gzip'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in chunks:
+                    output.write(chunk)
+        else:
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
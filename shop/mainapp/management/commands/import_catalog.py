@@ -0,0 +1,176 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from mainapp.facets import FACET_MODELS, invalidate_facet_index
+from mainapp.models import Category, ImageJob, Product, ProductIndex, bulk_update_by_pk, get_image_references
+from mainapp.pagecache import SIDEBAR_TAG, bump_page_tags, get_product_tag, get_products_tag
+from mainapp.search import index_products
+
+
+BOOLEAN_VALUES = {
+    'true': True, 'yes': True, 'да': True, '1': True,
+    'false': False, 'no': False, 'нет': False, '0': False
+}
+
+SKIPPED_FIELDS = ('id', 'category', 'image_hash', 'image_status', 'created_at', 'updated_at')
+
+
+def read_rows(path, file_format):
+    with open(path, encoding='utf-8-sig', newline='') as source:
+        if file_format == 'csv':
+            yield from csv.DictReader(source)
+            return
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                yield e
+
+
+class Command(BaseCommand):
+    help = 'Загружает прайс-лист поставщика (CSV/JSONL) с пакетным обновлением товаров по slug'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--model', required=True, choices=sorted(FACET_MODELS))
+        parser.add_argument('--format', choices=('csv', 'jsonl'))
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--skip-images', action='store_true', help='Не ставить изображения в очередь обработки')
+
+    def handle(self, *args, **options):
+        self.model = FACET_MODELS[options['model']]
+        self.skip_images = options['skip_images']
+        file_format = options['format'] or os.path.splitext(options['path'])[1].lstrip('.').lower()
+        if file_format not in ('csv', 'jsonl'):
+            raise CommandError('Неизвестный формат файла: {}'.format(file_format))
+        try:
+            self.category = Category.objects.get(slug=options['model'])
+        except Category.DoesNotExist:
+            raise CommandError('Категория {} не найдена'.format(options['model']))
+        self.fields = {
+            field.name: field for field in self.model._meta.concrete_fields if field.name not in SKIPPED_FIELDS
+        }
+        self.required_fields = [
+            name for name, field in self.fields.items() if not field.null and not field.has_default()
+        ]
+        self.stats = {'created': 0, 'updated': 0, 'errors': 0}
+
+        started = time.monotonic()
+        rows = enumerate(read_rows(options['path'], file_format), start=1)
+        while True:
+            batch = list(islice(rows, options['batch_size']))
+            if not batch:
+                break
+            self.import_batch(batch)
+        elapsed = time.monotonic() - started
+
+        Category.objects.invalidate_left_sidebar()
+        invalidate_facet_index(self.model)
+        bump_page_tags(SIDEBAR_TAG)
+        total = self.stats['created'] + self.stats['updated']
+        self.stdout.write(self.style.SUCCESS(
+            'Создано: {created}, обновлено: {updated}, ошибок: {errors}. '
+            '{total} строк за {elapsed:.1f} с ({rate:.0f} строк/с)'.format(
+                total=total, elapsed=elapsed, rate=total / elapsed if elapsed else 0, **self.stats
+            )
+        ))
+
+    def clean_row(self, number, row):
+        if isinstance(row, ValueError):
+            self.report_error(number, 'некорректный JSON: {}'.format(row))
+            return None
+        if not isinstance(row, dict):
+            self.report_error(number, 'ожидается объект JSON')
+            return None
+        values = {}
+        try:
+            for name, raw in row.items():
+                field = self.fields.get(name)
+                if field is None:
+                    continue
+                if isinstance(raw, str):
+                    raw = raw.strip()
+                    if field.get_internal_type() == 'BooleanField':
+                        raw = BOOLEAN_VALUES.get(raw.lower(), raw)
+                if raw in ('', None) and field.null:
+                    values[name] = None
+                    continue
+                values[name] = field.clean(raw, None)
+        except ValidationError as e:
+            self.report_error(number, '{}: {}'.format(name, '; '.join(e.messages)))
+            return None
+        if not values.get('slug'):
+            self.report_error(number, 'не указан slug')
+            return None
+        return values
+
+    def report_error(self, number, message):
+        self.stats['errors'] += 1
+        self.stderr.write('Строка {}: {}'.format(number, message))
+
+    def import_batch(self, batch):
+        cleaned = {}
+        for number, row in batch:
+            values = self.clean_row(number, row)
+            if values is not None:
+                cleaned[values['slug']] = (number, values)
+
+        with transaction.atomic():
+            existing = self.model._base_manager.in_bulk(list(cleaned), field_name='slug')
+            shared_images = get_image_references([
+                values['image'] for _, values in cleaned.values() if values.get('image')
+            ])
+            to_create, to_update, updated_fields, new_images = [], [], set(), []
+            for slug, (number, values) in cleaned.items():
+                product = existing.get(slug)
+                if product is None:
+                    missing = [name for name in self.required_fields if name not in values]
+                    if missing:
+                        self.report_error(number, 'не заполнены поля: {}'.format(', '.join(missing)))
+                        continue
+                    product = self.model(category=self.category, **values)
+                    to_create.append(product)
+                else:
+                    old_image = product.image.name
+                    for name, value in values.items():
+                        setattr(product, name, value)
+                    updated_fields.update(values)
+                    to_update.append(product)
+                if 'image' in values and (product.pk is None or old_image != values['image']):
+                    if values['image'] in shared_images:
+                        product.image_hash, product.image_status = shared_images[values['image']]
+                        updated_fields.update(('image_hash', 'image_status'))
+                    elif not self.skip_images:
+                        new_images.append(slug)
+                        product.image_hash = ''
+                        product.image_status = Product.IMAGE_STATUS_PROCESSING
+                        updated_fields.update(('image_hash', 'image_status'))
+
+            self.model._base_manager.bulk_create(to_create)
+            if to_update and updated_fields:
+                bulk_update_by_pk(self.model, to_update, sorted(updated_fields | {'updated_at'}))
+            if to_create or to_update:
+                Category.objects.touch(self.category.pk)
+
+            products = list(self.model._base_manager.filter(slug__in=list(cleaned)))
+            entry_ids = ProductIndex.objects.sync_many(self.model, products)
+            index_products(products, entry_ids)
+            if new_images and not self.skip_images:
+                ImageJob.objects.bulk_create([
+                    ImageJob(ct_model=self.model._meta.model_name, object_id=product.pk, source=product.image.name)
+                    for product in products if product.slug in new_images
+                ])
+        ct_model = self.model._meta.model_name
+        bump_page_tags(get_products_tag(ct_model), *[get_product_tag(ct_model, product.slug) for product in to_update])
+        self.stats['created'] += len(to_create)
+        self.stats['updated'] += len(to_update)
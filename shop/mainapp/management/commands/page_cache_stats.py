@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from mainapp.pagecache import get_page_cache_stats, reset_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает число попаданий и промахов кэша страниц каталога'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reset', action='store_true', help='Обнулить счётчики после вывода')
+
+    def handle(self, *args, **options):
+        stats = get_page_cache_stats()
+        total = stats['hit'] + stats['miss']
+        self.stdout.write('Попаданий: {hit}, промахов: {miss}, доля попаданий: {ratio:.1%}'.format(
+            ratio=stats['hit'] / total if total else 0, **stats
+        ))
+        if options['reset']:
+            reset_page_cache_stats()
@@ -0,0 +1,51 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from mainapp.images import render_product_image
+from mainapp.models import ImageJob, Product
+
+
+class Command(BaseCommand):
+    help = 'Обрабатывает очередь изображений товаров в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=20)
+        parser.add_argument('--loop', action='store_true', help='Не завершаться, ожидая новые задания')
+        parser.add_argument('--interval', type=float, default=2.0, help='Пауза между опросами очереди, сек.')
+
+    def handle(self, *args, **options):
+        connections.close_all()
+        processed = 0
+        with ProcessPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                jobs = ImageJob.objects.claim(options['batch_size'])
+                if not jobs:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['interval'])
+                    continue
+                futures, sources = [], set()
+                for job in jobs:
+                    try:
+                        with default_storage.open(job.source, 'rb') as source:
+                            data = source.read()
+                    except OSError as e:
+                        job.fail(str(e))
+                        continue
+                    futures.append((job, pool.submit(render_product_image, data, Product.MAX_RESOLUTION)))
+                for job, future in futures:
+                    try:
+                        job.complete(future.result())
+                    except Exception as e:
+                        job.fail(str(e))
+                    else:
+                        sources.add(job.source)
+                    processed += 1
+                ImageJob.objects.delete_unused_sources(sources)
+        self.stdout.write(self.style.SUCCESS('Обработано изображений: {}'.format(processed)))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from mainapp.models import ProductIndex
+from mainapp.search import rebuild_search_index
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает единый индекс товаров и полнотекстовый поисковый индекс'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            ProductIndex.objects.rebuild(batch_size=options['batch_size'])
+            rebuild_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS('Индекс товаров перестроен: {}'.format(ProductIndex.objects.count())))
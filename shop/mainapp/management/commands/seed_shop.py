@@ -0,0 +1,289 @@
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO
+
+from PIL import Image
+from django.contrib.auth.hashers import make_password
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from mainapp.facets import FACET_MODELS, invalidate_facet_index
+from mainapp.images import get_image_hash
+from mainapp.models import (Bricks, BuildingBlocks, Cart, CartProduct, Category, Customer, ImageJob, Order,
+                            Product, ProductIndex, Smartphones, User, bulk_insert)
+from mainapp.pagecache import SIDEBAR_TAG, bump_page_tags, get_products_tag
+from mainapp.search import rebuild_search_index, remove_products
+from mainapp.utils import recalc_cart
+
+
+SEED_PREFIX = 'seed-'
+PLACEHOLDER_IMAGE = 'seed/placeholder.jpg'
+
+CATEGORIES = (
+    ('Кирпичи', 'bricks'),
+    ('Строительные блоки', 'buildingblocks'),
+    ('Смартфоны', 'smartphones')
+)
+
+FACTORIES = ('ЛСР', 'Победа', 'Кирово-Чепецк', 'Braer', 'Bonolit', 'Ytong', 'Porotherm', 'Wienerberger')
+WAREHOUSES = ('Санкт-Петербург', 'Москва', 'Казань', 'Екатеринбург', 'Новосибирск')
+COLOURS = ('красный', 'белый', 'серый', 'коричневый', 'жёлтый', 'чёрный', 'бежевый')
+FROST_RESISTANCE = ('F25', 'F35', 'F50', 'F75', 'F100')
+DENSITIES = ('D400', 'D500', 'D600', 'D800')
+DIAGONALS = ('5.5', '6.1', '6.5', '6.7')
+WORDS = ('прочный', 'тёплый', 'облицовочный', 'надёжный', 'морозостойкий', 'лёгкий', 'экологичный', 'доступный')
+
+
+class Command(BaseCommand):
+    help = 'Детерминированно заполняет базу синтетическим каталогом, покупателями, корзинами и заказами'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bricks', type=int, default=100000)
+        parser.add_argument('--blocks', type=int, default=50000)
+        parser.add_argument('--phones', type=int, default=20000)
+        parser.add_argument('--customers', type=int, default=1000)
+        parser.add_argument('--cart-lines', type=int, default=20, help='Позиций в открытой корзине покупателя')
+        parser.add_argument('--orders', type=int, default=10000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument('--flush', action='store_true', help='Удалить ранее сгенерированные данные')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        started = time.monotonic()
+
+        if options['flush']:
+            self.flush()
+        elif User.objects.filter(username__startswith=SEED_PREFIX).exists() or any(
+            model._base_manager.filter(slug__startswith=SEED_PREFIX).exists() for model in FACET_MODELS.values()
+        ):
+            raise CommandError('Сгенерированные данные уже есть, используйте --flush')
+
+        self.categories = {
+            slug: Category.objects.get_or_create(slug=slug, defaults={'name': name})[0] for name, slug in CATEGORIES
+        }
+        self.image, self.image_hash = self.get_placeholder_image()
+
+        products = {}
+        for model, count, make in (
+            (Bricks, options['bricks'], self.make_brick),
+            (BuildingBlocks, options['blocks'], self.make_block),
+            (Smartphones, options['phones'], self.make_phone)
+        ):
+            products[model] = self.insert(model, (make(i) for i in range(count)), count)
+        customers = self.create_customers(options['customers'])
+        self.create_carts(customers, products, options['cart_lines'], options['orders'])
+
+        self.stdout.write('Перестройка индекса товаров и поиска...')
+        with transaction.atomic():
+            ProductIndex.objects.rebuild(batch_size=self.batch_size)
+            rebuild_search_index(batch_size=self.batch_size)
+        Category.objects.touch(*[category.pk for category in self.categories.values()])
+        Category.objects.invalidate_left_sidebar()
+        for model in FACET_MODELS.values():
+            invalidate_facet_index(model)
+        bump_page_tags(SIDEBAR_TAG, *[get_products_tag(ct_model) for ct_model in FACET_MODELS])
+        self.stdout.write(self.style.SUCCESS('Готово за {:.1f} с'.format(time.monotonic() - started)))
+
+    def flush(self):
+        with transaction.atomic():
+            User.objects.filter(username__startswith=SEED_PREFIX).delete()
+            cart_ids = set()
+            for ct_model, model in FACET_MODELS.items():
+                products = model._base_manager.filter(slug__startswith=SEED_PREFIX)
+                ids = products.values('id')
+                lines = CartProduct.objects.filter(
+                    content_type=ContentType.objects.get_for_model(model), object_id__in=ids
+                )
+                cart_ids.update(lines.values_list('cart_id', flat=True))
+                lines.delete()
+                ImageJob.objects.filter(ct_model=ct_model, object_id__in=ids).delete()
+                entries = ProductIndex.objects.filter(ct_model=ct_model, object_id__in=ids)
+                remove_products(list(entries.values_list('id', flat=True)))
+                entries.delete()
+                products._raw_delete(products.db)
+            for cart in Cart.objects.filter(id__in=cart_ids, in_order=False):
+                recalc_cart(cart)
+
+    def get_placeholder_image(self):
+        if not default_storage.exists(PLACEHOLDER_IMAGE):
+            buffer = BytesIO()
+            Image.new('RGB', Product.MIN_RESOLUTION, (200, 200, 200)).save(buffer, 'JPEG')
+            default_storage.save(PLACEHOLDER_IMAGE, ContentFile(buffer.getvalue()))
+        with default_storage.open(PLACEHOLDER_IMAGE) as image:
+            return PLACEHOLDER_IMAGE, get_image_hash(image)
+
+    def insert(self, model, objs, count, pre_save=True):
+        if not count:
+            return []
+        last_id = model._base_manager.order_by('-id').values_list('id', flat=True).first() or 0
+        started = time.monotonic()
+        batch = []
+        with transaction.atomic():
+            for obj in objs:
+                batch.append(obj)
+                if len(batch) >= self.batch_size:
+                    bulk_insert(model, batch, pre_save=pre_save)
+                    batch = []
+            bulk_insert(model, batch, pre_save=pre_save)
+        elapsed = time.monotonic() - started
+        self.stdout.write('{}: {} строк за {:.1f} с ({:.0f} строк/с)'.format(
+            model._meta.verbose_name, count, elapsed, count / elapsed if elapsed else 0
+        ))
+        return list(model._base_manager.filter(id__gt=last_id).order_by('id').values_list('id', flat=True))
+
+    def make_product(self, model, ct_model, title, i, price, **fields):
+        return model(
+            category=self.categories[ct_model],
+            title='{} {}'.format(title, i),
+            slug='{}{}-{}'.format(SEED_PREFIX, ct_model, i),
+            image=self.image,
+            image_hash=self.image_hash,
+            description=' '.join(self.rng.sample(WORDS, 4)),
+            price=Decimal(price).quantize(Decimal('0.01')),
+            quantity=self.rng.randint(0, 10000),
+            created_at=self.now - timedelta(seconds=self.rng.randint(0, 365 * 24 * 3600)),
+            **fields
+        )
+
+    def make_brick(self, i):
+        rng = self.rng
+        return self.make_product(
+            Bricks, 'bricks', 'Кирпич', i, rng.uniform(10, 150),
+            size=rng.choice(('250x120x65', '250x120x88', '250x85x65')),
+            factory=rng.choice(FACTORIES),
+            type=rng.choice(('facing', 'construction', 'warm_ceramics')),
+            material='керамика',
+            voidness=rng.choice(('full-bodied', 'hollow')),
+            surface=rng.choice(('smooth', 'grainy')),
+            colour=rng.choice(COLOURS),
+            chamfer=rng.random() < 0.5,
+            endurance=rng.choice(('M100', 'M150', 'M175', 'M200')),
+            frost_resistance=rng.choice(FROST_RESISTANCE),
+            water_absorption='{}%'.format(rng.randint(6, 14)),
+            weight=Decimal(rng.uniform(1.8, 4.2)).quantize(Decimal('0.001')),
+            packaging='{} шт на поддоне'.format(rng.choice((288, 352, 480))),
+            warehouse=rng.choice(WAREHOUSES)
+        )
+
+    def make_block(self, i):
+        rng = self.rng
+        return self.make_product(
+            BuildingBlocks, 'buildingblocks', 'Блок', i, rng.uniform(60, 600),
+            size=rng.choice(('600x300x200', '625x250x300', '600x250x375')),
+            factory=rng.choice(FACTORIES),
+            type=rng.choice(('aerated_concrete', 'ceramic', 'expanded_clay_concrete', 'concrete')),
+            material='газобетон',
+            colour=rng.choice(COLOURS),
+            density=rng.choice(DENSITIES),
+            endurance=rng.choice(('B2', 'B2.5', 'B3.5')),
+            thermal_conductivity='{:.2f}'.format(rng.uniform(0.09, 0.2)),
+            frost_resistance=rng.choice(FROST_RESISTANCE),
+            weight=Decimal(rng.uniform(10, 40)).quantize(Decimal('0.001')),
+            packaging='{} шт на поддоне'.format(rng.choice((24, 32, 40))),
+            warehouse=rng.choice(WAREHOUSES)
+        )
+
+    def make_phone(self, i):
+        rng = self.rng
+        return self.make_product(
+            Smartphones, 'smartphones', 'Смартфон', i, rng.uniform(5000, 120000),
+            size=rng.choice(('S', 'M', 'L')),
+            diagonal=rng.choice(DIAGONALS),
+            colour=rng.choice(COLOURS),
+            sd=rng.random() < 0.5,
+            sd_volume_max=rng.choice((None, '128', '256', '512'))
+        )
+
+    def create_customers(self, count):
+        password = make_password(None)
+        user_ids = self.insert(User, (
+            User(username='{}user-{}'.format(SEED_PREFIX, i), password=password, first_name='Покупатель',
+                 last_name=str(i), date_joined=self.now)
+            for i in range(count)
+        ), count)
+        return self.insert(Customer, (
+            Customer(user_id=user_id, phone='+7900{:07d}'.format(i), address='ул. Тестовая, {}'.format(i))
+            for i, user_id in enumerate(user_ids)
+        ), count)
+
+    def create_carts(self, customers, products, cart_lines, orders):
+        if not customers:
+            return
+        catalog = [
+            (ContentType.objects.get_for_model(model).pk, model, ids) for model, ids in products.items() if ids
+        ]
+        if not catalog:
+            return
+        prices = {
+            model: dict(model._base_manager.filter(id__in=ids).values_list('id', 'price'))
+            for _, model, ids in catalog
+        }
+        carts = []
+        for customer_id in customers:
+            carts.append((customer_id, False, self.pick_lines(catalog, prices, cart_lines)))
+        for _ in range(orders):
+            carts.append((self.rng.choice(customers), True, self.pick_lines(catalog, prices, self.rng.randint(1, 5))))
+
+        cart_ids = self.insert(Cart, (
+            Cart(owner_id=customer_id, in_order=in_order, total_products=len(lines),
+                 final_price=sum(line.final_price for line in lines))
+            for customer_id, in_order, lines in carts
+        ), len(carts))
+        lines = [
+            (cart_id, customer_id, line) for cart_id, (customer_id, _, cart) in zip(cart_ids, carts) for line in cart
+        ]
+        for cart_id, customer_id, line in lines:
+            line.cart_id = cart_id
+            line.user_id = customer_id
+        line_ids = self.insert(CartProduct, (line for _, _, line in lines), len(lines))
+        self.insert(Cart.products.through, (
+            Cart.products.through(cart_id=cart_id, cartproduct_id=line_id)
+            for (cart_id, _, _), line_id in zip(lines, line_ids)
+        ), len(lines))
+
+        ordered = [(cart_id, customer_id) for cart_id, (customer_id, in_order, _) in zip(cart_ids, carts) if in_order]
+        order_ids = self.insert(Order, (self.make_order(cart_id, customer_id, i) for i, (cart_id, customer_id) in
+                                        enumerate(ordered)), len(ordered), pre_save=False)
+        self.insert(Customer.orders.through, (
+            Customer.orders.through(customer_id=customer_id, order_id=order_id)
+            for (_, customer_id), order_id in zip(ordered, order_ids)
+        ), len(ordered))
+
+    def pick_lines(self, catalog, prices, count):
+        lines, picked = [], set()
+        for _ in range(count):
+            content_type_id, model, ids = self.rng.choice(catalog)
+            object_id = self.rng.choice(ids)
+            if (content_type_id, object_id) in picked:
+                continue
+            picked.add((content_type_id, object_id))
+            qty = self.rng.randint(1, 10)
+            lines.append(CartProduct(
+                content_type_id=content_type_id, object_id=object_id, qty=qty,
+                final_price=qty * prices[model][object_id]
+            ))
+        return lines
+
+    def make_order(self, cart_id, customer_id, i):
+        created_at = self.now - timedelta(minutes=self.rng.randint(0, 60 * 24 * 365))
+        return Order(
+            cart_id=cart_id,
+            customer_id=customer_id,
+            first_name='Покупатель',
+            last_name=str(i),
+            phone='+7900{:07d}'.format(i),
+            address='ул. Тестовая, {}'.format(i),
+            status=self.rng.choice([status for status, _ in Order.STATUS_CHOICES]),
+            buying_type=self.rng.choice([buying_type for buying_type, _ in Order.BUYING_TYPE_CHOICES]),
+            created_at=created_at,
+            order_date=(created_at + timedelta(days=self.rng.randint(1, 14))).date()
+        )
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from mainapp.models import Cart
+from mainapp.utils import recalc_cart
+
+
+class Command(BaseCommand):
+    help = 'Сверяет итоги корзин с суммой их позиций и при необходимости пересчитывает их'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Пересчитать корзины с расхождениями')
+        parser.add_argument('--include-ordered', action='store_true', help='Проверять также оформленные корзины')
+
+    def handle(self, *args, **options):
+        carts = Cart.objects.annotate(
+            lines_price=models.Sum('products__final_price'), lines_count=models.Count('products')
+        )
+        if not options['include_ordered']:
+            carts = carts.filter(in_order=False)
+        mismatched = 0
+        for cart in carts.iterator():
+            if cart.final_price == (cart.lines_price or 0) and cart.total_products == cart.lines_count:
+                continue
+            mismatched += 1
+            self.stdout.write('Корзина {}: {} / {} вместо {} / {}'.format(
+                cart.id, cart.final_price, cart.total_products, cart.lines_price or 0, cart.lines_count
+            ))
+            if options['fix']:
+                with transaction.atomic():
+                    recalc_cart(cart)
+        if mismatched and not options['fix']:
+            raise CommandError('Корзин с расхождениями: {}'.format(mismatched))
+        self.stdout.write(self.style.SUCCESS('Проверка завершена, расхождений: {}'.format(mismatched)))
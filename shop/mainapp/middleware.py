@@ -0,0 +1,54 @@
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger('mainapp.queries')
+
+
+class QueryRecorder:
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.fingerprints[sql] += 1
+
+    def get_duplicates(self, threshold):
+        return [(sql, count) for sql, count in self.fingerprints.most_common() if count >= threshold]
+
+
+class QueryStatsMiddleware:
+
+    def __init__(self, get_response):
+        if not settings.QUERY_STATS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duplicates = recorder.get_duplicates(settings.QUERY_STATS_DUPLICATE_THRESHOLD)
+        response['X-Query-Count'] = recorder.count
+        response['X-Query-Time'] = '{:.1f}'.format(recorder.duration * 1000)
+        response['X-Query-Duplicates'] = len(duplicates)
+        logger.info('%s %s: %d queries, %.1f ms', request.method, request.path, recorder.count, recorder.duration * 1000)
+        for sql, count in duplicates:
+            logger.warning('%s %s: possible N+1, %d x %s', request.method, request.path, count, sql)
+        return response
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0022_order_cart'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ct_model', models.CharField(max_length=100, verbose_name='Модель товара')),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=255, verbose_name='Наименование')),
+                ('slug', models.SlugField()),
+                ('image', models.ImageField(upload_to='', verbose_name='Изображение')),
+                ('price', models.DecimalField(decimal_places=2, max_digits=9, verbose_name='Цена')),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='mainapp.category', verbose_name='Категория')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(fields=['ct_model', '-id'], name='product_index_model_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='productindex',
+            constraint=models.UniqueConstraint(fields=('ct_model', 'object_id'), name='unique_product_index_entry'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:11
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0023_productindex'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='cartproduct',
+            name='user',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='mainapp.customer', verbose_name='Покупатель'),
+        ),
+    ]
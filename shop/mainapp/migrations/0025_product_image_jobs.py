@@ -0,0 +1,62 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0024_cartproduct_user_nullable'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ct_model', models.CharField(max_length=100, verbose_name='Модель товара')),
+                ('object_id', models.PositiveIntegerField()),
+                ('source', models.CharField(max_length=255, verbose_name='Исходный файл')),
+                ('source_hash', models.CharField(max_length=64)),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('processing', 'Обрабатывается'), ('done', 'Готово'), ('failed', 'Ошибка')], default='pending', max_length=20, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='bricks',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='bricks',
+            name='image_status',
+            field=models.CharField(choices=[('ready', 'Готово'), ('processing', 'Обрабатывается'), ('failed', 'Ошибка обработки')], default='ready', editable=False, max_length=20, verbose_name='Статус изображения'),
+        ),
+        migrations.AddField(
+            model_name='buildingblocks',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='buildingblocks',
+            name='image_status',
+            field=models.CharField(choices=[('ready', 'Готово'), ('processing', 'Обрабатывается'), ('failed', 'Ошибка обработки')], default='ready', editable=False, max_length=20, verbose_name='Статус изображения'),
+        ),
+        migrations.AddField(
+            model_name='smartphones',
+            name='image_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='smartphones',
+            name='image_status',
+            field=models.CharField(choices=[('ready', 'Готово'), ('processing', 'Обрабатывается'), ('failed', 'Ошибка обработки')], default='ready', editable=False, max_length=20, verbose_name='Статус изображения'),
+        ),
+        migrations.AddIndex(
+            model_name='imagejob',
+            index=models.Index(fields=['status', 'id'], name='image_job_status_idx'),
+        ),
+    ]
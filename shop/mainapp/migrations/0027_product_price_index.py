@@ -0,0 +1,25 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0026_product_search'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bricks',
+            index=models.Index(fields=['price', 'id'], name='bricks_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='buildingblocks',
+            index=models.Index(fields=['price', 'id'], name='buildingblocks_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smartphones',
+            index=models.Index(fields=['price', 'id'], name='smartphones_price_id_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0028_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bricks',
+            index=models.Index(fields=['category', 'price'], name='bricks_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='buildingblocks',
+            index=models.Index(fields=['category', 'price'], name='buildingblocks_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cart',
+            index=models.Index(fields=['owner', 'in_order'], name='cart_owner_in_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cartproduct',
+            index=models.Index(fields=['cart', 'content_type', 'object_id'], name='cart_product_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'status', '-created_at'], name='order_customer_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smartphones',
+            index=models.Index(fields=['category', 'price'], name='smartphones_cat_price_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0029_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bricks',
+            name='size',
+            field=models.CharField(max_length=255, null=True, verbose_name='Размер'),
+        ),
+        migrations.AlterField(
+            model_name='buildingblocks',
+            name='size',
+            field=models.CharField(max_length=255, null=True, verbose_name='Размер'),
+        ),
+        migrations.AlterField(
+            model_name='smartphones',
+            name='size',
+            field=models.CharField(max_length=255, null=True, verbose_name='Размер'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:46
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0030_alter_product_size'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='productindex',
+            name='product_index_model_id_idx',
+        ),
+        migrations.AddField(
+            model_name='bricks',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='buildingblocks',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='productindex',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='smartphones',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата добавления'),
+        ),
+        migrations.AddIndex(
+            model_name='productindex',
+            index=models.Index(fields=['ct_model', '-created_at', '-object_id'], name='product_index_created_idx'),
+        ),
+    ]
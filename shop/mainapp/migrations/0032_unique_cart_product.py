@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:47
+
+from django.db import migrations, models
+
+
+def merge_duplicate_lines(apps, schema_editor):
+    CartProduct = apps.get_model('mainapp', 'CartProduct')
+    Cart = apps.get_model('mainapp', 'Cart')
+    duplicates = (
+        CartProduct.objects.values('cart', 'content_type', 'object_id')
+        .annotate(first_id=models.Min('id'), lines=models.Count('id'))
+        .filter(lines__gt=1)
+    )
+    cart_ids = set()
+    for duplicate in duplicates:
+        CartProduct.objects.filter(
+            cart=duplicate['cart'], content_type=duplicate['content_type'], object_id=duplicate['object_id']
+        ).exclude(id=duplicate['first_id']).delete()
+        cart_ids.add(duplicate['cart'])
+    for cart in Cart.objects.filter(id__in=cart_ids):
+        totals = cart.products.aggregate(models.Sum('final_price'), models.Count('id'))
+        cart.final_price = totals['final_price__sum'] or 0
+        cart.total_products = totals['id__count']
+        cart.save(update_fields=['final_price', 'total_products'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0031_product_created_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_lines, migrations.RunPython.noop),
+        migrations.RemoveIndex(
+            model_name='cartproduct',
+            name='cart_product_lookup_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='cartproduct',
+            constraint=models.UniqueConstraint(fields=('cart', 'content_type', 'object_id'), name='unique_cart_product'),
+        ),
+    ]
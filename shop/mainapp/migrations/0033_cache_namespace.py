@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 10:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0032_unique_cart_product'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheNamespace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Пространство имён')),
+                ('version', models.BigIntegerField(verbose_name='Версия')),
+            ],
+        ),
+    ]
@@ -1,7 +1,14 @@
+from django.contrib.messages import get_messages
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.views.generic.detail import SingleObjectMixin
 from django.views.generic import View
 
-from .models import Category, Cart, Customer, Bricks, BuildingBlocks, Smartphones
+from .models import Category, Cart, Bricks, BuildingBlocks, Smartphones
+from .facets import get_facet_index, filter_by_facets
+from .fragments import fill_fragments
+from .pagecache import SIDEBAR_TAG, count_page_cache, get_cached_page, get_page_etag, get_page_key, store_page
+from .utils import get_customer, get_cart_summary, get_catalog_etag, remember_cart, forget_cart, cart_from_summary
 
 
 class CategoryDetailMixin(SingleObjectMixin):
@@ -13,30 +20,125 @@ class CategoryDetailMixin(SingleObjectMixin):
     }
 
     def get_context_data(self, **kwargs):
-        if isinstance(self.get_object(), Category):
-            model = self.CATEGORY_SLUG2PRODUCT_MODEL[self.get_object().slug]
-            context = super().get_context_data(**kwargs)
-            context['categories'] = Category.objects.get_categories_for_left_sidebar()
-            context['category_products'] = model.objects.all()
-            return context
         context = super().get_context_data(**kwargs)
         context['categories'] = Category.objects.get_categories_for_left_sidebar()
+        if isinstance(self.object, Category):
+            model = self.CATEGORY_SLUG2PRODUCT_MODEL[self.object.slug]
+            facet_index = get_facet_index(model)
+            selected = facet_index.get_selected(self.request.GET)
+            context['category_products'] = filter_by_facets(model.objects.all(), selected)
+            context['facets'] = facet_index.get_counts(selected)
         return context
 
 
 class CartMixin(View):
 
+    cart_summary_only = False
+    create_cart = False
+
     def dispatch(self, request, *args, **kwargs):
-        if request.user.is_authenticated:
-            customer = Customer.objects.filter(user=request.user).first()
-            if not customer:
-                customer = Customer.objects.create(user=request.user)
+        self.cart = self.get_cart(request)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_cart(self, request):
+        summary = get_cart_summary(request)
+        if summary and self.cart_summary_only:
+            return cart_from_summary(summary)
+        customer = get_customer(request)
+        cart = None
+        if summary and summary['id']:
+            cart = Cart.objects.filter(pk=summary['id'], owner=customer, in_order=False).first()
+        if cart is None and customer is not None:
             cart = Cart.objects.filter(owner=customer, in_order=False).first()
-            if not cart:
-                cart = Cart.objects.create(owner=customer)
+        if cart is None:
+            cart = Cart(owner=customer, for_anonymous_user=customer is None)
+            if self.create_cart:
+                cart.save()
+        if cart.pk is None and customer is None:
+            forget_cart(request)
         else:
-            cart = Cart.objects.filter(for_anonymous_user=True).first()
-            if not cart:
-                cart = Cart.objects.create(for_anonymous_user=True)
-        self.cart = cart
-        return super().dispatch(request, *args, **kwargs)
+            remember_cart(request, cart)
+        return cart
+
+
+class ConditionalGetMixin(View):
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD') or len(get_messages(request)):
+            return super().dispatch(request, *args, **kwargs)
+        version = Category.objects.get_catalog_version()
+        if version['last_modified'] is None:
+            return super().dispatch(request, *args, **kwargs)
+        summary = get_cart_summary(request)
+        response = get_conditional_response(request, etag=get_catalog_etag(request, version, summary))
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code == 200:
+                response['ETag'] = get_catalog_etag(request, version, get_cart_summary(request))
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+
+class PageCacheMixin(View):
+
+    page_cache_tags = ()
+
+    def get_page_cache_tags(self):
+        return [SIDEBAR_TAG] + list(self.page_cache_tags)
+
+    def get_fragment_context(self, request):
+        if request.user.is_authenticated or get_cart_summary(request) is not None:
+            cart = self.get_cart(request)
+        else:
+            cart = Cart(for_anonymous_user=True)
+        return {'cart': cart, 'messages': get_messages(request)}
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        response = self.get_cached_response(request)
+        if response is None:
+            response = self.store_page_response(super().dispatch(request, *args, **kwargs))
+        return self.finalize_page_response(response)
+
+    def get_cached_response(self, request):
+        request._defer_fragments = True
+        self.page_key = get_page_key(request.get_full_path(), self.get_page_cache_tags())
+        self.fragment_context = self.get_fragment_context(request)
+        self.page_etag = None
+        if not len(self.fragment_context['messages']):
+            self.page_etag = get_page_etag(self.page_key, get_cart_summary(request))
+        response = get_conditional_response(request, etag=self.page_etag)
+        if response is not None:
+            return response
+        page = get_cached_page(self.page_key)
+        if page is None:
+            count_page_cache('miss')
+            return None
+        count_page_cache('hit')
+        response = HttpResponse(
+            fill_fragments(page['content'], self.fragment_context), content_type=page['content_type']
+        )
+        response['X-Page-Cache'] = 'HIT'
+        return response
+
+    def store_page_response(self, response):
+        response['X-Page-Cache'] = 'MISS'
+        if response.status_code != 200:
+            return response
+
+        def fill(rendered):
+            store_page(self.page_key, rendered)
+            rendered.content = fill_fragments(rendered.content, self.fragment_context)
+
+        if hasattr(response, 'add_post_render_callback'):
+            response.add_post_render_callback(fill)
+        else:
+            fill(response)
+        return response
+
+    def finalize_page_response(self, response):
+        if self.page_etag is not None and response.status_code == 200:
+            response['ETag'] = self.page_etag
+        patch_vary_headers(response, ('Cookie',))
+        return response
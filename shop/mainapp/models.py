@@ -1,14 +1,20 @@
-from django.db import models
+from django.apps import apps
+from django.db import connections, models, router, transaction
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.contenttypes.fields import GenericForeignKey
-from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.urls import reverse
 from django.utils import timezone
 
-import sys
+import os
+import time
+from itertools import islice
 from PIL import Image
-from io import BytesIO
+
+from .cache import catalog_cache
+from .images import get_image_hash
 
 User = get_user_model()
 
@@ -17,6 +23,55 @@ def get_models_for_count(*model_names):
     return [models.Count(model_name) for model_name in model_names]
 
 
+def bulk_update_by_pk(model, objs, field_names):
+    if not objs:
+        return
+    fields = [model._meta.get_field(name) for name in field_names]
+    connection = connections[router.db_for_write(model)]
+    sql = 'UPDATE {} SET {} WHERE {} = %s'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join('{} = %s'.format(connection.ops.quote_name(field.column)) for field in fields),
+        connection.ops.quote_name(model._meta.pk.column)
+    )
+    params = [
+        [field.get_db_prep_save(field.pre_save(obj, False), connection) for field in fields] + [obj.pk]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def bulk_insert(model, objs, pre_save=True):
+    if not objs:
+        return
+    fields = [field for field in model._meta.concrete_fields if field is not model._meta.auto_field]
+    connection = connections[router.db_for_write(model)]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields))
+    )
+    params = [
+        [
+            field.get_db_prep_save(field.pre_save(obj, True) if pre_save else getattr(obj, field.attname), connection)
+            for field in fields
+        ]
+        for obj in objs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def get_image_references(names):
+    references = {}
+    for model in (Bricks, BuildingBlocks, Smartphones):
+        for name, image_hash, image_status in model._base_manager.filter(image__in=names).values_list(
+            'image', 'image_hash', 'image_status'
+        ):
+            references.setdefault(name, (image_hash, image_status))
+    return references
+
+
 def get_product_url(obj, viewname):
     ct_model = obj.__class__._meta.model_name
     return reverse(viewname, kwargs={'ct_model': ct_model, 'slug': obj.slug})
@@ -32,21 +87,17 @@ class MaxResolutionErrorException(Exception):
 
 class LatestProductsManager:
 
-    @staticmethod
-    def get_products_for_main_page(*args, **kwargs):
+    PRODUCTS_PER_MODEL = 5
+
+    def get_products_for_main_page(self, *args, **kwargs):
         with_respect_to = kwargs.get("with_respect_to")
-        products = []
-        ct_models = ContentType.objects.filter(model__in=args)
-        for ct_model in ct_models:
-            model_products = ct_model.model_class()._base_manager.all().order_by("-id")[:5]
-            products.extend(model_products)
-        if with_respect_to:
-            ct_model = ContentType.objects.filter(model=with_respect_to)
-            if ct_model.exists():
-                if with_respect_to in args:
-                    return sorted(
-                        products, key=lambda x: x.__class__._meta.model_name.startswith(with_respect_to), reverse=True
-                    )
+        products = list(
+            ProductIndex.objects.filter(ct_model__in=args).order_by(
+                "-created_at", "-object_id"
+            )[:self.PRODUCTS_PER_MODEL * len(args)]
+        )
+        if with_respect_to and with_respect_to in args:
+            return sorted(products, key=lambda x: x.ct_model.startswith(with_respect_to), reverse=True)
         return products
 
 
@@ -62,22 +113,36 @@ class CategoryManager(models.Manager):
         'Строительные блоки': 'buildingblocks__count'
     }
 
+    LEFT_SIDEBAR_NAMESPACE = 'sidebar'
+
     def get_queryset(self):
         return super().get_queryset()
 
     def get_categories_for_left_sidebar(self):
+        return catalog_cache.get_or_set(self.LEFT_SIDEBAR_NAMESPACE, 'left', self.build_left_sidebar)
+
+    def build_left_sidebar(self):
         models = get_models_for_count("smartphones", "buildingblocks", "bricks")
         qs = list(self.get_queryset().annotate(*models))
-        data = [
+        return [
             dict(name=c.name, url=c.get_absolute_url(), count=getattr(c, self.CATEGORY_NAME_COUNT_NAME[c.name]))
             for c in qs
         ]
-        return data
+
+    def invalidate_left_sidebar(self):
+        catalog_cache.bump(self.LEFT_SIDEBAR_NAMESPACE)
+
+    def touch(self, *pks):
+        self.get_queryset().filter(pk__in=pks).update(updated_at=timezone.now())
+
+    def get_catalog_version(self):
+        return self.get_queryset().aggregate(last_modified=models.Max('updated_at'), count=models.Count('id'))
 
 
 class Category(models.Model):
     name = models.CharField(max_length=255, verbose_name="Имя категории")
     slug = models.SlugField(unique=True)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
     objects = CategoryManager()
 
     def __str__(self):
@@ -92,8 +157,22 @@ class Product(models.Model):
     MAX_RESOLUTION = (900, 900)
     MAX_IMAGE_SIZE = 3145728
 
+    IMAGE_STATUS_READY = 'ready'
+    IMAGE_STATUS_PROCESSING = 'processing'
+    IMAGE_STATUS_FAILED = 'failed'
+
+    IMAGE_STATUS_CHOICES = (
+        (IMAGE_STATUS_READY, 'Готово'),
+        (IMAGE_STATUS_PROCESSING, 'Обрабатывается'),
+        (IMAGE_STATUS_FAILED, 'Ошибка обработки')
+    )
+
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(fields=['price', 'id'], name='%(class)s_price_id_idx'),
+            models.Index(fields=['category', 'price'], name='%(class)s_cat_price_idx')
+        ]
 
     category = models.ForeignKey(Category, verbose_name="Категория", on_delete=models.CASCADE)
     title = models.CharField(max_length=255, verbose_name="Наименование")
@@ -103,6 +182,20 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=9, decimal_places=2, verbose_name="Цена")
     quantity = models.DecimalField(max_digits=9, decimal_places=0, verbose_name="Количество")
     size = models.CharField(max_length=255, verbose_name="Размер", null=True)
+    image_hash = models.CharField(max_length=64, blank=True, editable=False)
+    image_status = models.CharField(
+        max_length=20, choices=IMAGE_STATUS_CHOICES, default=IMAGE_STATUS_READY, editable=False,
+        verbose_name="Статус изображения"
+    )
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="Дата добавления")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата изменения")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'slug' in field_names:
+            instance._loaded_slug = values[field_names.index('slug')]
+        return instance
 
     def __str__(self):
         return self.title
@@ -111,32 +204,22 @@ class Product(models.Model):
         return self.__class__.__name__.lower()
 
     def save(self, *args, **kwargs):
-        image = self.image
-        img = Image.open(image)
-        min_height, min_width = self.MIN_RESOLUTION
-        max_height, max_width = self.MAX_RESOLUTION
-        if img.width < min_width or img.height < min_height:
-            raise MinResolutionErrorException("Разрешение изображения меньше минимального!")
-        else:
-            if img.width > img.height:
-                width_new = max_width
-                height_new = (max_width * img.height) // img.width
-            else:
-                width_new = (max_height * img.width) // img.height
-                height_new = max_height
-            new_img = img.convert("RGB")
-            resized_new_img = new_img.resize((width_new, height_new))
-
-            base_img_white = Image.open('media/base/white_background.png')
-            base_img_white.paste(resized_new_img, (500-width_new//2, 500-height_new//2))
-            resized_new_img = base_img_white
-
-            filestream = BytesIO()
-            resized_new_img.save(filestream, 'JPEG', quality=95)
-            filestream.seek(0)
-            name = '{}.{}'.format(*self.image.name.split('.'))
-            self.image = InMemoryUploadedFile(filestream, 'ImageField', name, 'jpeg/image', sys.getsizeof(filestream), None)
+        process_image = False
+        if self.image and not self.image._committed:
+            img = Image.open(self.image)
+            min_height, min_width = self.MIN_RESOLUTION
+            if img.width < min_width or img.height < min_height:
+                raise MinResolutionErrorException("Разрешение изображения меньше минимального!")
+            image_hash = get_image_hash(self.image)
+            if image_hash != self.image_hash:
+                self.image_hash = image_hash
+                self.image_status = self.IMAGE_STATUS_PROCESSING
+                process_image = True
+            elif self.pk is not None:
+                self.image = self.__class__._base_manager.filter(pk=self.pk).values_list('image', flat=True).get()
         super().save(*args, **kwargs)
+        if process_image:
+            ImageJob.objects.enqueue(self)
 
 
 class Bricks(Product):
@@ -215,8 +298,204 @@ class Smartphones(Product):
     #     return 'Нет'
 
 
+class ProductIndexManager(models.Manager):
+
+    PRODUCT_FIELDS = ('category_id', 'title', 'slug', 'image', 'price', 'created_at')
+
+    def get_fields_for_product(self, product):
+        return {field: getattr(product, field) for field in self.PRODUCT_FIELDS}
+
+    def sync(self, product):
+        return self.update_or_create(
+            ct_model=product._meta.model_name, object_id=product.pk, defaults=self.get_fields_for_product(product)
+        )[0]
+
+    def sync_many(self, model, products):
+        ct_model = model._meta.model_name
+        entries = {
+            entry.object_id: entry
+            for entry in self.filter(ct_model=ct_model, object_id__in=[product.pk for product in products])
+        }
+        new_entries = []
+        for product in products:
+            fields = self.get_fields_for_product(product)
+            entry = entries.get(product.pk)
+            if entry is None:
+                new_entries.append(self.model(ct_model=ct_model, object_id=product.pk, **fields))
+                continue
+            for field, value in fields.items():
+                setattr(entry, field, value)
+        bulk_update_by_pk(self.model, list(entries.values()), self.PRODUCT_FIELDS)
+        self.bulk_create(new_entries)
+        return dict(
+            self.filter(ct_model=ct_model, object_id__in=[product.pk for product in products]).values_list('object_id', 'id')
+        )
+
+    def remove(self, product):
+        entries = self.filter(ct_model=product._meta.model_name, object_id=product.pk)
+        entry_ids = list(entries.values_list('id', flat=True))
+        entries.delete()
+        return entry_ids
+
+    def rebuild(self, *product_models, batch_size=1000):
+        if not product_models:
+            product_models = (Bricks, BuildingBlocks, Smartphones)
+        self.filter(ct_model__in=[model._meta.model_name for model in product_models]).delete()
+        for model in product_models:
+            ct_model = model._meta.model_name
+            products = model._base_manager.order_by("id").iterator(chunk_size=batch_size)
+            while True:
+                entries = [
+                    self.model(ct_model=ct_model, object_id=product.pk, **self.get_fields_for_product(product))
+                    for product in islice(products, batch_size)
+                ]
+                if not entries:
+                    break
+                self.bulk_create(entries)
+
+
+class ProductIndex(models.Model):
+    ct_model = models.CharField(max_length=100, verbose_name="Модель товара")
+    object_id = models.PositiveIntegerField()
+    category = models.ForeignKey(Category, verbose_name="Категория", on_delete=models.CASCADE)
+    title = models.CharField(max_length=255, verbose_name="Наименование")
+    slug = models.SlugField()
+    image = models.ImageField(verbose_name="Изображение")
+    price = models.DecimalField(max_digits=9, decimal_places=2, verbose_name="Цена")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Дата добавления")
+    objects = ProductIndexManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['ct_model', 'object_id'], name='unique_product_index_entry')
+        ]
+        indexes = [
+            models.Index(fields=['ct_model', '-created_at', '-object_id'], name='product_index_created_idx')
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def get_model_name(self):
+        return self.ct_model
+
+    def get_absolute_url(self):
+        return reverse('product_detail', kwargs={'ct_model': self.ct_model, 'slug': self.slug})
+
+
+class ImageJobManager(models.Manager):
+
+    def enqueue(self, product):
+        ct_model = product._meta.model_name
+        self.filter(ct_model=ct_model, object_id=product.pk, status=ImageJob.STATUS_PENDING).delete()
+        return self.create(
+            ct_model=ct_model, object_id=product.pk, source=product.image.name, source_hash=product.image_hash
+        )
+
+    def claim(self, limit):
+        pending = self.filter(status=ImageJob.STATUS_PENDING).order_by('id').values_list('id', flat=True)[:limit]
+        claimed = []
+        for job_id in pending:
+            if self.filter(pk=job_id, status=ImageJob.STATUS_PENDING).update(
+                status=ImageJob.STATUS_PROCESSING, attempts=models.F('attempts') + 1, updated_at=timezone.now()
+            ):
+                claimed.append(job_id)
+        return list(self.filter(pk__in=claimed).order_by('id'))
+
+    def delete_unused_sources(self, names):
+        names = set(names) - set(get_image_references(names)) - set(self.filter(
+            source__in=names, status__in=[ImageJob.STATUS_PENDING, ImageJob.STATUS_PROCESSING]
+        ).values_list('source', flat=True))
+        for name in names:
+            default_storage.delete(name)
+        return names
+
+
+class ImageJob(models.Model):
+
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = (
+        (STATUS_PENDING, 'В очереди'),
+        (STATUS_PROCESSING, 'Обрабатывается'),
+        (STATUS_DONE, 'Готово'),
+        (STATUS_FAILED, 'Ошибка')
+    )
+
+    ct_model = models.CharField(max_length=100, verbose_name="Модель товара")
+    object_id = models.PositiveIntegerField()
+    source = models.CharField(max_length=255, verbose_name="Исходный файл")
+    source_hash = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Статус")
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, verbose_name="Ошибка")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    objects = ImageJobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='image_job_status_idx')
+        ]
+
+    def __str__(self):
+        return "{} #{}: {}".format(self.ct_model, self.object_id, self.status)
+
+    def get_product(self):
+        product_model = apps.get_model('mainapp', self.ct_model)
+        return product_model._base_manager.filter(pk=self.object_id).first()
+
+    def complete(self, data):
+        product = self.get_product()
+        if product is not None and product.image_hash == self.source_hash:
+            name = default_storage.save('{}.jpg'.format(os.path.splitext(self.source)[0]), ContentFile(data))
+            product.image = name
+            product.image_status = Product.IMAGE_STATUS_READY
+            product.save(update_fields=['image', 'image_status', 'updated_at'])
+        self.status = self.STATUS_DONE
+        self.save(update_fields=['status', 'updated_at'])
+
+    def fail(self, error):
+        product = self.get_product()
+        if product is not None and product.image_hash == self.source_hash:
+            product.image_status = Product.IMAGE_STATUS_FAILED
+            product.save(update_fields=['image_status', 'updated_at'])
+        self.status = self.STATUS_FAILED
+        self.error = error
+        self.save(update_fields=['status', 'error', 'updated_at'])
+
+
+
+class CacheNamespaceManager(models.Manager):
+
+    def get_versions(self, names):
+        return dict(self.filter(name__in=names).values_list('name', 'version'))
+
+    def bump(self, names):
+        with transaction.atomic(using=router.db_for_write(self.model)):
+            self.filter(name__in=names).update(version=models.F('version') + 1)
+            versions = self.get_versions(names)
+            missing = [name for name in names if name not in versions]
+            if missing:
+                version = int(time.time() * 1000)
+                self.bulk_create([self.model(name=name, version=version) for name in missing], ignore_conflicts=True)
+                versions = self.get_versions(names)
+        return versions
+
+
+class CacheNamespace(models.Model):
+    name = models.CharField(max_length=255, unique=True, verbose_name="Пространство имён")
+    version = models.BigIntegerField(verbose_name="Версия")
+    objects = CacheNamespaceManager()
+
+    def __str__(self):
+        return "{}: {}".format(self.name, self.version)
+
 class CartProduct(models.Model):
-    user = models.ForeignKey("Customer", verbose_name="Покупатель", on_delete=models.CASCADE)
+    user = models.ForeignKey("Customer", null=True, blank=True, verbose_name="Покупатель", on_delete=models.CASCADE)
     cart = models.ForeignKey("Cart", verbose_name="Корзина", on_delete=models.CASCADE, related_name="related_products")
     content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE)
     object_id = models.PositiveIntegerField()
@@ -224,6 +503,11 @@ class CartProduct(models.Model):
     qty = models.PositiveIntegerField(default=1)
     final_price = models.DecimalField(max_digits=9, decimal_places=2, verbose_name="Общая цена")
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['cart', 'content_type', 'object_id'], name='unique_cart_product')
+        ]
+
     def __str__(self):
         return "Продукт: {} (для корзины)".format(self.content_object.title)
 
@@ -240,6 +524,11 @@ class Cart(models.Model):
     in_order = models.BooleanField(default=False)
     for_anonymous_user = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['owner', 'in_order'], name='cart_owner_in_order_idx')
+        ]
+
     def __str__(self):
         return str(self.id)
 
@@ -291,5 +580,10 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now=True, verbose_name='Дата создания заказа')
     order_date = models.DateField(verbose_name='Дата получения заказа', default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer', 'status', '-created_at'], name='order_customer_status_idx')
+        ]
+
     def __str__(self):
         return str(self.id)
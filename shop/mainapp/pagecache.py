@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .cache import catalog_cache
+
+
+PAGE_NAMESPACE = 'page'
+STATS_KEY = 'mainapp:page_cache:{}'
+
+SIDEBAR_TAG = 'sidebar'
+
+page_cache_counts = Counter()
+page_cache_counts_lock = threading.Lock()
+page_cache_flush = {'next': 0.0}
+
+
+def get_products_tag(ct_model):
+    return 'products:{}'.format(ct_model)
+
+
+def get_product_tag(ct_model, slug):
+    return 'product:{}:{}'.format(ct_model, slug)
+
+
+def bump_page_tags(*tags):
+    catalog_cache.bump(*tags)
+
+
+def get_page_key(path, tags):
+    versions = '.'.join(str(version) for version in catalog_cache.get_versions(tags))
+    return '{}:{}'.format(hashlib.md5(path.encode()).hexdigest(), versions)
+
+
+def count_page_cache(result):
+    now = time.monotonic()
+    with page_cache_counts_lock:
+        page_cache_counts[result] += 1
+        if now < page_cache_flush['next']:
+            return
+        page_cache_flush['next'] = now + settings.PAGE_CACHE_STATS_FLUSH_INTERVAL
+        pending = dict(page_cache_counts)
+        page_cache_counts.clear()
+    flush_page_cache_counts(pending)
+
+
+def flush_page_cache_counts(counts):
+    for result, count in counts.items():
+        catalog_cache.incr(STATS_KEY.format(result), count)
+
+
+def get_page_cache_stats():
+    stats = catalog_cache.shared.get_many([STATS_KEY.format('hit'), STATS_KEY.format('miss')])
+    with page_cache_counts_lock:
+        return {
+            result: stats.get(STATS_KEY.format(result), 0) + page_cache_counts[result] for result in ('hit', 'miss')
+        }
+
+
+def reset_page_cache_stats():
+    with page_cache_counts_lock:
+        page_cache_counts.clear()
+    catalog_cache.shared.delete_many([STATS_KEY.format('hit'), STATS_KEY.format('miss')])
+
+
+def get_page_etag(key, *parts):
+    return '"{}"'.format(hashlib.md5(repr((key,) + parts).encode()).hexdigest())
+
+
+def get_cached_page(key):
+    return catalog_cache.get(PAGE_NAMESPACE, key)
+
+
+def store_page(key, response):
+    catalog_cache.set(PAGE_NAMESPACE, key, {
+        'content': response.content,
+        'content_type': response['Content-Type']
+    }, settings.PAGE_CACHE_TIMEOUT)
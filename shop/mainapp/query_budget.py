@@ -0,0 +1,79 @@
+from contextlib import ExitStack
+
+from django.db import connections
+from django.urls import reverse
+
+from .cache import catalog_cache
+from .facets import FACET_MODELS
+from .middleware import QueryRecorder
+from .pagecache import PAGE_NAMESPACE
+
+
+QUERY_BUDGETS = {
+    'base': 2,
+    'product_detail': 3,
+    'category_detail': 3,
+    'search': 3,
+    'cart': 4,
+    'checkout': 4,
+    'categories_list': 3,
+    'smartphone_list': 3,
+    'smartphone_detail': 3,
+    'brick_list': 3,
+    'brick_detail': 3,
+    'buildingblock_list': 3,
+    'buildingblock_detail': 3,
+    'customers_list': 2,
+    'product_search': 3,
+    'product_facets': 2
+}
+
+API_DETAIL_NAMES = {
+    'bricks': 'brick_detail',
+    'buildingblocks': 'buildingblock_detail',
+    'smartphones': 'smartphone_detail'
+}
+
+
+def get_budget_paths():
+    paths = {name: reverse(name) for name in (
+        'base', 'cart', 'checkout', 'categories_list', 'smartphone_list', 'brick_list', 'buildingblock_list',
+        'customers_list'
+    )}
+    add_to_cart = None
+    for ct_model, model in sorted(FACET_MODELS.items()):
+        product = model.objects.select_related('category').order_by('id').first()
+        if product is None:
+            continue
+        word = product.title.split()[0]
+        paths[API_DETAIL_NAMES[ct_model]] = reverse(API_DETAIL_NAMES[ct_model], kwargs={'id': product.id})
+        paths['category_detail'] = product.category.get_absolute_url()
+        paths['product_detail'] = product.get_absolute_url()
+        paths['search'] = '{}?q={}'.format(reverse('search'), word)
+        paths['product_search'] = '{}?q={}'.format(reverse('product_search'), word)
+        paths['product_facets'] = reverse('product_facets', kwargs={'ct_model': ct_model})
+        add_to_cart = reverse('add_to_cart', kwargs={'ct_model': ct_model, 'slug': product.slug})
+    return paths, add_to_cart
+
+
+def count_queries(client, path, **extra):
+    recorder = QueryRecorder()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        response = client.get(path, **extra)
+    return response, recorder
+
+
+def assert_query_budget(client, url_name, path=None, budget=None, **kwargs):
+    path = path or reverse(url_name, kwargs=kwargs)
+    budget = QUERY_BUDGETS[url_name] if budget is None else budget
+    catalog_cache.bump(PAGE_NAMESPACE)
+    response, recorder = count_queries(client, path)
+    if response.status_code != 200:
+        raise AssertionError('{} ({}): статус ответа {}'.format(url_name, path, response.status_code))
+    if recorder.count > budget:
+        raise AssertionError('{} ({}): {} запросов при бюджете {}\n{}'.format(
+            url_name, path, recorder.count, budget, '\n'.join(recorder.fingerprints)
+        ))
+    return recorder.count
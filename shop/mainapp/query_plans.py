@@ -0,0 +1,48 @@
+from django.db import connections
+
+from .facets import FACET_MODELS
+from .models import CacheNamespace, Cart, CartProduct, Customer, ImageJob, Order, ProductIndex
+
+
+ALLOWED_SCANS = {}
+
+
+def get_hot_queries():
+    queries = [
+        ('cart_product_lookup', CartProduct.objects.filter(cart=1, content_type=1, object_id=1)),
+        ('cart_lines', CartProduct.objects.filter(related_cart=1).order_by('id')),
+        ('open_cart_by_pk', Cart.objects.filter(pk=1, owner=1, in_order=False)),
+        ('open_cart_by_owner', Cart.objects.filter(owner=1, in_order=False)),
+        ('customer_by_user', Customer.objects.filter(user=1)),
+        ('customer_orders', Order.objects.filter(customer=1, status=Order.STATUS_NEW).order_by('-created_at')),
+        ('latest_products', ProductIndex.objects.filter(ct_model__in=list(FACET_MODELS)).order_by(
+            '-created_at', '-object_id'
+        )[:15]),
+        ('product_index_entry', ProductIndex.objects.filter(ct_model='bricks', object_id=1)),
+        ('pending_image_jobs', ImageJob.objects.filter(status=ImageJob.STATUS_PENDING).order_by('id')[:50]),
+        ('cache_namespace_versions', CacheNamespace.objects.filter(name__in=['page', 'sidebar']))
+    ]
+    for ct_model, model in sorted(FACET_MODELS.items()):
+        queries.extend([
+            ('{}_by_slug'.format(ct_model), model.objects.filter(slug='slug')),
+            ('{}_by_category_price'.format(ct_model), model.objects.filter(category=1).order_by('price')[:20]),
+            ('{}_price_keyset'.format(ct_model), model.objects.filter(price__gt=1).order_by('price', 'id')[:21]),
+            ('{}_id_keyset'.format(ct_model), model.objects.filter(id__lt=1).order_by('-id')[:21])
+        ])
+    return queries
+
+
+def explain_query_plan(queryset):
+    connection = connections[queryset.db]
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_full_scan(detail):
+    return detail.startswith('SCAN ')
+
+
+def get_full_scans(name, plan):
+    return [detail for detail in plan if is_full_scan(detail) and detail not in ALLOWED_SCANS.get(name, ())]
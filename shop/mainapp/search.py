@@ -0,0 +1,122 @@
+import re
+
+from django.db import connection
+
+from .models import ProductIndex, Bricks, BuildingBlocks, Smartphones
+
+
+SEARCH_TABLE = 'mainapp_product_search'
+
+SEARCH_WEIGHTS = (10.0, 1.0, 3.0)
+
+SEARCH_ATTRIBUTES = {
+    'bricks': ('factory', 'type', 'material', 'voidness', 'surface', 'colour', 'warehouse'),
+    'buildingblocks': ('factory', 'type', 'material', 'colour', 'density', 'warehouse'),
+    'smartphones': ('diagonal', 'colour')
+}
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def is_search_available():
+    return connection.vendor == 'sqlite'
+
+
+def get_search_attributes(product):
+    values = []
+    for field_name in SEARCH_ATTRIBUTES[product._meta.model_name]:
+        value = getattr(product, field_name)
+        display = getattr(product, 'get_{}_display'.format(field_name), None)
+        values.append(str(value))
+        if display is not None and display() != value:
+            values.append(display())
+    return ' '.join(values)
+
+
+def get_search_row(product, entry_id):
+    return entry_id, product.title, product.description or '', get_search_attributes(product)
+
+
+def index_product(product, entry_id):
+    if not is_search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {} WHERE rowid = %s'.format(SEARCH_TABLE), [entry_id])
+        cursor.execute(
+            'INSERT INTO {} (rowid, title, description, attributes) VALUES (%s, %s, %s, %s)'.format(SEARCH_TABLE),
+            get_search_row(product, entry_id)
+        )
+
+
+def index_products(products, entry_ids):
+    if not is_search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            'DELETE FROM {} WHERE rowid = %s'.format(SEARCH_TABLE), [[entry_ids[product.pk]] for product in products]
+        )
+        insert_search_rows(cursor, [get_search_row(product, entry_ids[product.pk]) for product in products])
+
+
+def remove_products(entry_ids):
+    if not is_search_available() or not entry_ids:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany('DELETE FROM {} WHERE rowid = %s'.format(SEARCH_TABLE), [[pk] for pk in entry_ids])
+
+
+def rebuild_search_index(batch_size=1000):
+    if not is_search_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM {}'.format(SEARCH_TABLE))
+        for model in (Bricks, BuildingBlocks, Smartphones):
+            entry_ids = dict(
+                ProductIndex.objects.filter(ct_model=model._meta.model_name).values_list('object_id', 'id')
+            )
+            rows = []
+            for product in model._base_manager.order_by('id').iterator(chunk_size=batch_size):
+                if product.pk not in entry_ids:
+                    continue
+                rows.append(get_search_row(product, entry_ids[product.pk]))
+                if len(rows) >= batch_size:
+                    insert_search_rows(cursor, rows)
+                    rows = []
+            insert_search_rows(cursor, rows)
+
+
+def insert_search_rows(cursor, rows):
+    if rows:
+        cursor.executemany(
+            'INSERT INTO {} (rowid, title, description, attributes) VALUES (%s, %s, %s, %s)'.format(SEARCH_TABLE),
+            rows
+        )
+
+
+def build_match_query(text):
+    return ' '.join('"{}"*'.format(token) for token in TOKEN_RE.findall(text))
+
+
+def search_products(text, limit=20, ct_models=None):
+    match_query = build_match_query(text)
+    if not match_query:
+        return []
+    if not is_search_available():
+        queryset = ProductIndex.objects.filter(title__icontains=text)
+        if ct_models:
+            queryset = queryset.filter(ct_model__in=ct_models)
+        return list(queryset.order_by('-id')[:limit])
+    params = [match_query]
+    model_filter = ''
+    if ct_models:
+        model_filter = 'AND p.ct_model IN ({})'.format(', '.join(['%s'] * len(ct_models)))
+        params.extend(ct_models)
+    params.append(limit)
+    return list(ProductIndex.objects.raw(
+        'SELECT p.* FROM {search} s JOIN mainapp_productindex p ON p.id = s.rowid '
+        'WHERE {search} MATCH %s {model_filter} '
+        'ORDER BY bm25({search}, {weights}) LIMIT %s'.format(
+            search=SEARCH_TABLE, model_filter=model_filter, weights=', '.join(str(w) for w in SEARCH_WEIGHTS)
+        ),
+        params
+    ))
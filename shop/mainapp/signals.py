@@ -0,0 +1,65 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Category, Bricks, BuildingBlocks, Smartphones, ProductIndex
+from .pagecache import SIDEBAR_TAG, bump_page_tags, get_product_tag, get_products_tag
+from .facets import invalidate_facet_index
+from .search import index_product, remove_products
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Bricks)
+@receiver([post_save, post_delete], sender=BuildingBlocks)
+@receiver([post_save, post_delete], sender=Smartphones)
+def invalidate_left_sidebar(sender, **kwargs):
+    transaction.on_commit(Category.objects.invalidate_left_sidebar)
+
+
+@receiver([post_save, post_delete], sender=Bricks)
+@receiver([post_save, post_delete], sender=BuildingBlocks)
+@receiver([post_save, post_delete], sender=Smartphones)
+def touch_product_category(sender, instance, **kwargs):
+    Category.objects.touch(instance.category_id)
+
+
+@receiver(post_save, sender=Bricks)
+@receiver(post_save, sender=BuildingBlocks)
+@receiver(post_save, sender=Smartphones)
+def sync_product_index(sender, instance, **kwargs):
+    entry = ProductIndex.objects.sync(instance)
+    index_product(instance, entry.pk)
+
+
+@receiver(post_delete, sender=Bricks)
+@receiver(post_delete, sender=BuildingBlocks)
+@receiver(post_delete, sender=Smartphones)
+def remove_product_index(sender, instance, **kwargs):
+    remove_products(ProductIndex.objects.remove(instance))
+
+
+@receiver([post_save, post_delete], sender=Bricks)
+@receiver([post_save, post_delete], sender=BuildingBlocks)
+@receiver([post_save, post_delete], sender=Smartphones)
+def invalidate_product_facets(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate_facet_index(sender))
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_pages(sender, **kwargs):
+    transaction.on_commit(lambda: bump_page_tags(SIDEBAR_TAG))
+
+
+@receiver([post_save, post_delete], sender=Bricks)
+@receiver([post_save, post_delete], sender=BuildingBlocks)
+@receiver([post_save, post_delete], sender=Smartphones)
+def invalidate_product_pages(sender, instance, signal, created=False, **kwargs):
+    ct_model = sender._meta.model_name
+    tags = [get_products_tag(ct_model), get_product_tag(ct_model, instance.slug)]
+    loaded_slug = getattr(instance, '_loaded_slug', None)
+    if loaded_slug and loaded_slug != instance.slug:
+        tags.append(get_product_tag(ct_model, loaded_slug))
+    if created or signal is post_delete:
+        tags.append(SIDEBAR_TAG)
+    instance._loaded_slug = instance.slug
+    transaction.on_commit(lambda: bump_page_tags(*tags))
@@ -0,0 +1,15 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from mainapp.fragments import FRAGMENT_MARKER, render_fragment
+
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def fragment(context, name):
+    request = context.get('request')
+    if getattr(request, '_defer_fragments', False):
+        return mark_safe(FRAGMENT_MARKER.format(name))
+    return render_fragment(name, context.flatten())
@@ -1,7 +1,11 @@
 from django import template
+from django.conf import settings
+from django.db.models import BooleanField
+from django.utils.html import format_html
 from django.utils.safestring import mark_safe
 
-from mainapp.models import Smartphones
+from mainapp.cache import catalog_cache
+from mainapp.models import Bricks, BuildingBlocks, Smartphones
 
 
 register = template.Library()
@@ -61,18 +65,59 @@ PRODUCT_SPEC = {
     }
 }
 
+OPTIONAL_SPEC_FIELDS = {
+    'smartphones': {
+        'sd_volume_max': 'sd'
+    }
+}
+
+BOOLEAN_DISPLAY = {True: 'Да', False: 'Нет'}
+
+PRODUCT_SPEC_NAMESPACE = 'product_spec'
+
+
+def compile_product_spec(model):
+    model_name = model._meta.model_name
+    optional_fields = OPTIONAL_SPEC_FIELDS.get(model_name, {})
+    spec = []
+    for name, field_name in PRODUCT_SPEC[model_name].items():
+        field = model._meta.get_field(field_name)
+        if field.choices:
+            display = dict(field.flatchoices)
+        elif isinstance(field, BooleanField):
+            display = BOOLEAN_DISPLAY
+        else:
+            display = None
+        spec.append((name, field.attname, display, optional_fields.get(field_name)))
+    return tuple(spec)
+
+
+COMPILED_PRODUCT_SPEC = {
+    model._meta.model_name: compile_product_spec(model) for model in (Bricks, BuildingBlocks, Smartphones)
+}
+
+
 def get_product_spec(product, model_name):
-    table_content = ''
-    for name, value in PRODUCT_SPEC[model_name].items():
-        table_content += TABLE_CONTENT.format(name=name, value=getattr(product, value))
-    return table_content
+    rows = []
+    for name, attname, display, condition in COMPILED_PRODUCT_SPEC[model_name]:
+        if condition and not getattr(product, condition):
+            continue
+        value = getattr(product, attname)
+        if display is not None:
+            value = display.get(value, value)
+        rows.append(format_html(TABLE_CONTENT, name=name, value=value))
+    return ''.join(rows)
+
+
+def get_product_spec_cache_key(product):
+    return '{}:{}:{}'.format(product._meta.model_name, product.pk, product.updated_at.timestamp())
+
 
 @register.filter
 def product_spec(product):
-    model_name = product.__class__._meta.model_name
-    if isinstance(product, Smartphones):
-        if not product.sd:
-            PRODUCT_SPEC['smartphones'].pop('Максимальный объем встраиваемой памяти')
-        else:
-            PRODUCT_SPEC['smartphones']['Максимальный объем встраиваемой памяти'] = 'sd_volume_max'
-    return mark_safe(TABLE_HEAD + get_product_spec(product, model_name) + TABLE_TAIL)
+    table = catalog_cache.get_or_set(
+        PRODUCT_SPEC_NAMESPACE, get_product_spec_cache_key(product),
+        lambda: TABLE_HEAD + get_product_spec(product, product._meta.model_name) + TABLE_TAIL,
+        settings.PRODUCT_SPEC_CACHE_TIMEOUT
+    )
+    return mark_safe(table)
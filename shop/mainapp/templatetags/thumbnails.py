@@ -0,0 +1,20 @@
+from django import template
+from django.conf import settings
+from django.urls import reverse
+
+from mainapp.images import get_image_version
+
+
+register = template.Library()
+
+
+@register.filter
+def resized(image, size):
+    if not image:
+        return ''
+    width, height = (int(value) for value in size.split('x'))
+    if (width, height) not in settings.RESIZED_IMAGE_SIZES:
+        return image.url
+    url = reverse('resized_image', kwargs={'width': width, 'height': height, 'path': image.name})
+    version = get_image_version(image.path)
+    return '{}?v={}'.format(url, version) if version else url
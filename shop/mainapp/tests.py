@@ -1,3 +1,395 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .cache import catalog_cache
+from .models import (
+    Bricks, BuildingBlocks, CacheNamespace, Cart, Category, Customer, ImageJob, Order, Product, Smartphones, User
+)
+from .query_budget import QUERY_BUDGETS, assert_query_budget, get_budget_paths
+from .query_plans import explain_query_plan, get_full_scans, get_hot_queries
+
+
+TEST_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'
+    }
+}
+
+PRODUCT_DEFAULTS = {
+    Bricks: ('Кирпичи', dict(
+        title='Кирпич 1', size='250x120x65', factory='Завод', type='facing', material='керамика', voidness='hollow',
+        surface='smooth', colour='красный', endurance='M150', frost_resistance='F50', water_absorption='8%',
+        weight='2.5', packaging='352 шт на поддоне', warehouse='Москва'
+    )),
+    BuildingBlocks: ('Строительные блоки', dict(
+        title='Блок 1', size='600x300x200', factory='Завод', type='aerated_concrete', material='газобетон',
+        colour='серый', density='D500', endurance='B2.5', thermal_conductivity='0.12', frost_resistance='F100',
+        weight='21.5', packaging='40 шт на поддоне', warehouse='Москва'
+    )),
+    Smartphones: ('Смартфоны', dict(title='Смартфон 1', diagonal='6.1', colour='чёрный', sd=False))
+}
+
+
+
+@override_settings(CACHES=TEST_CACHES)
+class ShopTestCase(TestCase):
+
+    def setUp(self):
+        caches['default'].clear()
+        catalog_cache.clear_local()
+        stamp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, stamp_dir)
+        stamp_settings = override_settings(CACHE_VERSION_STAMP=os.path.join(stamp_dir, 'cache_versions.stamp'))
+        stamp_settings.enable()
+        self.addCleanup(stamp_settings.disable)
+
+    @staticmethod
+    def create_product(model, slug, **fields):
+        name, values = PRODUCT_DEFAULTS[model]
+        category = Category.objects.get_or_create(slug=model._meta.model_name, defaults={'name': name})[0]
+        values = dict(values, category=category, slug=slug, image='{}.jpg'.format(slug), price=25, quantity=100)
+        values.update(fields)
+        return model.objects.create(**values)
+
+    def create_brick(self, slug='kirpich-1', **fields):
+        return self.create_product(Bricks, slug, **fields)
+
+    @staticmethod
+    def create_customers(count, orders_per_customer=2):
+        offset = Customer.objects.count()
+        for i in range(offset, offset + count):
+            user = User.objects.create(username='customer-{}'.format(i))
+            customer = Customer.objects.create(user=user, phone='+7900{:07d}'.format(i))
+            for _ in range(orders_per_customer):
+                order = Order.objects.create(
+                    customer=customer, first_name='Иван', last_name=str(i), phone=customer.phone
+                )
+                customer.orders.add(order)
+
+
+class CustomerAPIQueryTests(ShopTestCase):
+
+    def assert_constant_queries(self, path, queries):
+        self.create_customers(5)
+        with self.assertNumQueries(queries):
+            self.assertEqual(self.client.get(path).status_code, 200)
+        self.create_customers(5)
+        with self.assertNumQueries(queries):
+            response = self.client.get(path)
+        self.assertEqual(len(response.json()['items']), 10)
+        return response
+
+    def test_customers_list(self):
+        response = self.assert_constant_queries(reverse('customers_list'), 1)
+        self.assertNotIn('orders', response.json()['items'][0])
+
+    def test_customers_list_with_orders(self):
+        response = self.assert_constant_queries('{}?include=orders'.format(reverse('customers_list')), 2)
+        self.assertEqual(len(response.json()['items'][0]['orders']), 2)
+
+
+class ProductAPITests(ShopTestCase):
+
+    def test_detail_with_invalid_id_returns_404(self):
+        for name in ('brick_detail', 'buildingblock_detail', 'smartphone_detail'):
+            self.assertEqual(self.client.get(reverse(name, kwargs={'id': 'abc'})).status_code, 404)
+
+    def test_facets_answer_conditional_get(self):
+        self.create_brick()
+        path = reverse('product_facets', kwargs={'ct_model': 'bricks'})
+        response = self.client.get(path)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+
+class FacetIndexTests(ShopTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.bricks = [
+            self.create_brick('kirpich-{}'.format(i), colour=colour, warehouse=warehouse)
+            for i, (colour, warehouse) in enumerate([
+                ('красный', 'Москва'), ('красный', 'Тула'), ('жёлтый', 'Москва')
+            ])
+        ]
+        self.path = reverse('product_facets', kwargs={'ct_model': 'bricks'})
+
+    def get_facets(self, query=''):
+        data = self.client.get('{}?{}'.format(self.path, query)).json()
+        counts = {
+            facet['field']: {value['value']: value['count'] for value in facet['values']}
+            for facet in data['facets']
+        }
+        return data['count'], counts
+
+    def test_counts_follow_the_selection(self):
+        count, counts = self.get_facets('warehouse=Москва')
+        self.assertEqual(count, 2)
+        self.assertEqual(counts['colour'], {'жёлтый': 1, 'красный': 1})
+        self.assertEqual(counts['warehouse'], {'Москва': 2, 'Тула': 1})
+        self.assertEqual(count, Bricks.objects.filter(warehouse='Москва').count())
+
+    def test_counts_are_rebuilt_after_product_changes(self):
+        self.get_facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bricks[2].colour = 'красный'
+            self.bricks[2].save()
+        self.assertEqual(self.get_facets()[1]['colour'], {'красный': 3})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bricks[0].delete()
+        count, counts = self.get_facets('colour=красный')
+        self.assertEqual(count, 2)
+        self.assertEqual(counts['warehouse'], {'Москва': 1, 'Тула': 1})
+
+
+class KeysetPaginationTests(ShopTestCase):
+
+    def setUp(self):
+        super().setUp()
+        prices = ['20.00', '10.00', '10.00', '30.00', '10.00', '20.00', '10.00']
+        self.bricks = [self.create_brick('kirpich-{}'.format(i), price=price) for i, price in enumerate(prices)]
+
+    def get_all_pages(self, ordering):
+        path = '{}?ordering={}&page_size=2'.format(reverse('brick_list'), ordering)
+        ids = []
+        while path is not None:
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.json()['items'])
+            path = response.json()['next']
+        return ids
+
+    def test_cursor_round_trip_breaks_ties_by_id(self):
+        for ordering, reverse_order in (('id', False), ('-id', True), ('price', False), ('-price', True)):
+            with self.subTest(ordering=ordering):
+                key = (lambda b: b.id) if ordering.endswith('id') else (lambda b: (b.price, b.id))
+                expected = [b.id for b in sorted(self.bricks, key=key, reverse=reverse_order)]
+                self.assertEqual(self.get_all_pages(ordering), expected)
+
+    def test_bad_cursor_returns_404(self):
+        path = reverse('brick_list')
+        next_link = self.client.get('{}?ordering=price&page_size=2'.format(path)).json()['next']
+        cursor = next_link.split('cursor=')[1].split('&')[0]
+        for query in ('cursor=abc', 'cursor=W10%3D', 'ordering=id&cursor={}'.format(cursor)):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get('{}?{}'.format(path, query)).status_code, 404)
+
+
+class CartViewTests(ShopTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.product = self.create_brick(price='33.33')
+        self.kwargs = {'ct_model': 'bricks', 'slug': self.product.slug}
+
+    def test_repeated_add_creates_one_line(self):
+        for _ in range(2):
+            self.client.get(reverse('add_to_cart', kwargs=self.kwargs))
+        cart = Cart.objects.get()
+        self.assertEqual((cart.products.count(), cart.total_products, cart.final_price), (1, 1, Decimal('33.33')))
+
+    def test_removing_last_line_resets_total(self):
+        self.client.get(reverse('add_to_cart', kwargs=self.kwargs))
+        self.client.post(reverse('change_qty', kwargs=self.kwargs), {'qty': 5})
+        self.assertEqual(Cart.objects.get().final_price, Decimal('166.65'))
+        for _ in range(2):
+            self.client.get(reverse('delete_from_cart', kwargs=self.kwargs))
+        cart = Cart.objects.get()
+        self.assertEqual((cart.products.count(), cart.total_products), (0, 0))
+        self.assertEqual(str(cart.final_price), '0.00')
+
+
+class PageCacheTests(ShopTestCase):
+
+    def test_anonymous_miss_sets_no_session_cookie(self):
+        product = self.create_brick()
+        for status in ('MISS', 'HIT'):
+            response = self.client.get(product.get_absolute_url())
+            self.assertEqual(response['X-Page-Cache'], status)
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+
+    def test_hit_fills_cart_badge_per_visitor(self):
+        product = self.create_brick()
+        badge = '<span class="badge badge-pill badge-danger">{}</span>'
+        response = self.client.get(product.get_absolute_url())
+        self.assertEqual(response['X-Page-Cache'], 'MISS')
+        self.assertContains(response, badge.format(0), html=True)
+        buyer = self.client_class()
+        buyer.get(reverse('add_to_cart', kwargs={'ct_model': 'bricks', 'slug': product.slug}))
+        for client, total in ((buyer, 1), (self.client, 0)):
+            response = client.get(product.get_absolute_url())
+            self.assertEqual(response['X-Page-Cache'], 'HIT')
+            self.assertContains(response, badge.format(total), html=True)
+            self.assertNotContains(response, '<!--fragment:')
+
+
+class SQLiteTransactionModeTests(SimpleTestCase):
+
+    def test_read_then_write_transactions_wait_for_the_lock(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        databases = ConnectionHandler({'default': {
+            'ENGINE': 'mainapp.backends.sqlite3',
+            'NAME': os.path.join(directory, 'db.sqlite3'),
+            'OPTIONS': {'timeout': 20, 'transaction_mode': 'IMMEDIATE'}
+        }})
+        with databases['default'].cursor() as cursor:
+            cursor.execute('CREATE TABLE counter (value integer)')
+            cursor.execute('INSERT INTO counter VALUES (0)')
+        databases['default'].close()
+
+        workers = 8
+        barrier = threading.Barrier(workers)
+        errors = []
+
+        def increment():
+            connection = databases['default']
+            try:
+                barrier.wait()
+                connection._start_transaction_under_autocommit()
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT value FROM counter')
+                    value = cursor.fetchone()[0]
+                    cursor.execute('UPDATE counter SET value = %s', [value + 1])
+                connection.commit()
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=increment) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        with databases['default'].cursor() as cursor:
+            cursor.execute('SELECT value FROM counter')
+            self.assertEqual(cursor.fetchone()[0], workers)
+        databases['default'].close()
+
+
+class CatalogCacheTests(ShopTestCase):
+
+    def get_bricks_count(self):
+        sidebar = Category.objects.get_categories_for_left_sidebar()
+        return next(category['count'] for category in sidebar if category['name'] == 'Кирпичи')
+
+    def test_warm_sidebar_issues_no_queries(self):
+        self.create_brick()
+        self.assertEqual(self.get_bricks_count(), 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_bricks_count(), 1)
+
+    def test_bump_from_another_process_is_picked_up_by_stamp(self):
+        self.create_brick()
+        self.assertEqual(self.get_bricks_count(), 1)
+        self.create_brick('kirpich-2')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_bricks_count(), 1)
+        CacheNamespace.objects.bump([Category.objects.LEFT_SIDEBAR_NAMESPACE])
+        catalog_cache.touch_stamp()
+        self.assertEqual(self.get_bricks_count(), 2)
+
+    def test_bump_touches_stamp_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            catalog_cache.bump(Category.objects.LEFT_SIDEBAR_NAMESPACE)
+        self.assertIsNone(catalog_cache.get_stamp())
+        for callback in callbacks:
+            callback()
+        self.assertIsNotNone(catalog_cache.get_stamp())
+
+
+class ImageJobTests(ShopTestCase):
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media_settings = override_settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        default_storage.save('shared.png', ContentFile(b'source'))
+
+    def test_complete_keeps_source_shared_by_other_products(self):
+        products = [self.create_brick(slug, image='shared.png') for slug in ('kirpich-1', 'kirpich-2')]
+        jobs = [
+            ImageJob.objects.create(ct_model='bricks', object_id=product.pk, source='shared.png', source_hash='')
+            for product in products
+        ]
+        jobs[0].complete(b'first')
+        self.assertTrue(default_storage.exists('shared.png'))
+        self.assertEqual(ImageJob.objects.delete_unused_sources(['shared.png']), set())
+        self.assertTrue(default_storage.exists('shared.png'))
+
+        jobs[1].complete(b'second')
+        self.assertTrue(default_storage.exists('shared.png'))
+        self.assertEqual(ImageJob.objects.delete_unused_sources(['shared.png']), {'shared.png'})
+        self.assertFalse(default_storage.exists('shared.png'))
+        for product in products:
+            product.refresh_from_db()
+            self.assertEqual(product.image_status, Product.IMAGE_STATUS_READY)
+            self.assertTrue(default_storage.exists(product.image.name))
+
+    def test_import_does_not_queue_shared_image(self):
+        self.create_brick('kirpich-1', image='shared.png', image_hash='abc')
+        path = os.path.join(tempfile.mkdtemp(), 'bricks.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(
+                'slug,title,image,price,quantity,factory,type,material,voidness,surface,colour,chamfer,endurance,'
+                'frost_resistance,water_absorption,weight,packaging,warehouse\n'
+                'kirpich-2,Кирпич 2,shared.png,30,10,Завод,facing,керамика,hollow,smooth,белый,да,M150,F50,8%,2.5,'
+                '352 шт на поддоне,Москва\n'
+            )
+        call_command('import_catalog', path, model='bricks', stdout=StringIO())
+        self.assertFalse(ImageJob.objects.exists())
+        product = Bricks.objects.get(slug='kirpich-2')
+        self.assertEqual((product.image_hash, product.image_status), ('abc', Product.IMAGE_STATUS_READY))
+
+
+class QueryBudgetTests(ShopTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for model, slug in ((Bricks, 'kirpich-1'), (BuildingBlocks, 'blok-1'), (Smartphones, 'smartfon-1')):
+            self.create_product(model, slug)
+        self.create_customers(3)
+        self.paths, add_to_cart = get_budget_paths()
+        self.client.get(add_to_cart)
+
+    def assertQueryBudget(self, url_name, path=None, budget=None, **kwargs):
+        path = path or self.paths[url_name]
+        self.assertEqual(self.client.get(path).status_code, 200)
+        return assert_query_budget(self.client, url_name, path, budget, **kwargs)
+
+    def test_every_budget_has_a_path(self):
+        self.assertEqual(set(self.paths), set(QUERY_BUDGETS))
+
+    def test_query_budgets(self):
+        for url_name in QUERY_BUDGETS:
+            with self.subTest(url_name=url_name):
+                self.assertQueryBudget(url_name)
+
+
+class QueryPlanTests(TestCase):
+
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in get_hot_queries():
+            with self.subTest(query=name):
+                plan = explain_query_plan(queryset)
+                self.assertEqual(get_full_scans(name, plan), [], '; '.join(plan))
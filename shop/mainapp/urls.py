@@ -8,7 +8,9 @@ from .views import (
     DeleteFromCartView,
     ChangeQTYView,
     CheckoutView,
-    MakeOrderView
+    MakeOrderView,
+    SearchView,
+    ResizedImageView
 )
 
 urlpatterns = [
@@ -20,5 +22,7 @@ urlpatterns = [
     path('remove-from-cart/<str:ct_model>/<str:slug>/', DeleteFromCartView.as_view(), name='delete_from_cart'),
     path('change-qty/<str:ct_model>/<str:slug>/', ChangeQTYView.as_view(), name='change_qty'),
     path('checkout/', CheckoutView.as_view(), name='checkout'),
-    path('make-order/', MakeOrderView.as_view(), name='make_order')
+    path('make-order/', MakeOrderView.as_view(), name='make_order'),
+    path('search/', SearchView.as_view(), name='search'),
+    path('media/r/<int:width>x<int:height>/<path:path>', ResizedImageView.as_view(), name='resized_image')
 ]
@@ -1,5 +1,13 @@
+import hashlib
+from decimal import Decimal
+
 from django.db import models
 
+from .models import Cart, Customer
+
+
+CART_SESSION_KEY = 'cart'
+
 
 def recalc_cart(cart):
     cart_data = cart.products.aggregate(models.Sum('final_price'), models.Count('id'))
@@ -9,3 +17,72 @@ def recalc_cart(cart):
         cart.final_price = 0
     cart.total_products = cart_data['id__count']
     cart.save()
+
+
+def apply_cart_delta(cart, price_delta=0, products_delta=0):
+    final_price_field = Cart._meta.get_field('final_price')
+    Cart.objects.filter(pk=cart.pk, in_order=False).update(
+        final_price=models.Case(
+            models.When(total_products__lte=-products_delta, then=models.Value(Decimal(0))),
+            default=models.Func(
+                models.F('final_price') + price_delta, models.Value(final_price_field.decimal_places),
+                function='ROUND'
+            ),
+            output_field=final_price_field
+        ),
+        total_products=models.F('total_products') + products_delta
+    )
+    cart.refresh_from_db(fields=['final_price', 'total_products'])
+
+
+def get_cart_lines(cart):
+    if cart.pk is None:
+        return []
+    return list(cart.products.order_by('id').prefetch_related('content_object'))
+
+
+def get_customer(request):
+    if not request.user.is_authenticated:
+        return None
+    if not hasattr(request, '_customer'):
+        customer = Customer.objects.filter(user=request.user).first()
+        if not customer:
+            customer = Customer.objects.create(user=request.user)
+        request._customer = customer
+    return request._customer
+
+
+def get_cart_summary(request):
+    summary = request.session.get(CART_SESSION_KEY)
+    if summary and summary['user_id'] == request.user.pk:
+        return summary
+    return None
+
+
+def remember_cart(request, cart):
+    summary = {
+        'id': cart.pk,
+        'user_id': request.user.pk,
+        'total_products': cart.total_products,
+        'final_price': str(cart.final_price)
+    }
+    if request.session.get(CART_SESSION_KEY) != summary:
+        request.session[CART_SESSION_KEY] = summary
+
+
+def forget_cart(request):
+    request.session.pop(CART_SESSION_KEY, None)
+
+
+def cart_from_summary(summary):
+    return Cart(
+        id=summary['id'],
+        total_products=summary['total_products'],
+        final_price=Decimal(summary['final_price'])
+    )
+
+
+def get_catalog_etag(request, version, *parts):
+    key = [request.get_full_path(), version['last_modified'].isoformat(), version['count']]
+    key.extend(parts)
+    return '"{}"'.format(hashlib.md5(repr(key).encode()).hexdigest())
@@ -1,17 +1,29 @@
+import os
+
+from django.conf import settings
 from django.db import transaction
 from django.shortcuts import render
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
-from django.http import HttpResponseRedirect
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponseRedirect
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.views.generic import DetailView, View
 
-from .models import Bricks, BuildingBlocks, Smartphones, Category, LatestProducts, Customer, Cart, CartProduct
-from .mixins import CategoryDetailMixin, CartMixin
+from .models import Bricks, BuildingBlocks, Smartphones, Category, LatestProducts, CartProduct
+from .mixins import CategoryDetailMixin, CartMixin, ConditionalGetMixin, PageCacheMixin
 from .forms import OrderForm
-from .utils import recalc_cart
+from .search import search_products
+from .pagecache import get_product_tag, get_products_tag
+from .images import RESIZED_FORMATS, get_image_version, get_resized_image
+from .utils import apply_cart_delta, get_cart_lines, get_customer, remember_cart, forget_cart
+
 
+class BaseView(PageCacheMixin, CartMixin, View):
 
-class BaseView(CartMixin, View):
+    cart_summary_only = True
+    page_cache_tags = [get_products_tag(ct_model) for ct_model in ('bricks', 'buildingblocks', 'smartphones')]
 
     def get(self, request, *args, **kwargs):
         categories = Category.objects.get_categories_for_left_sidebar()
@@ -24,7 +36,9 @@ class BaseView(CartMixin, View):
         return render(request, 'base.html', context)
 
 
-class ProductDetailView(CartMixin, CategoryDetailMixin, DetailView):
+class ProductDetailView(PageCacheMixin, CartMixin, CategoryDetailMixin, DetailView):
+
+    cart_summary_only = True
 
     CT_MODEL_MODEL_CLASS = {
         'bricks': Bricks,
@@ -37,6 +51,9 @@ class ProductDetailView(CartMixin, CategoryDetailMixin, DetailView):
         self.queryset = self.model._base_manager.all()
         return super().dispatch(request, *args, **kwargs)
 
+    def get_page_cache_tags(self):
+        return super().get_page_cache_tags() + [get_product_tag(self.kwargs['ct_model'], self.kwargs['slug'])]
+
     context_object_name = 'product'
     template_name = 'product_detail.html'
     slug_url_kwarg = 'slug'
@@ -48,14 +65,18 @@ class ProductDetailView(CartMixin, CategoryDetailMixin, DetailView):
         return context
 
 
-class CategoryDetailView(CartMixin, CategoryDetailMixin, DetailView):
+class CategoryDetailView(PageCacheMixin, CartMixin, CategoryDetailMixin, DetailView):
 
+    cart_summary_only = True
     model = Category
     queryset = Category.objects.all()
     context_object_name = 'category'
     template_name = 'category_detail.html'
     slug_url_kwarg = 'slug'
 
+    def get_page_cache_tags(self):
+        return super().get_page_cache_tags() + [get_products_tag(self.kwargs['slug'])]
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['cart'] = self.cart
@@ -64,16 +85,21 @@ class CategoryDetailView(CartMixin, CategoryDetailMixin, DetailView):
 
 class AddToCartView(CartMixin, View):
 
+    create_cart = True
+
     def get(self, request, *args, **kwargs):
         ct_model, product_slug = kwargs.get('ct_model'), kwargs.get('slug')
-        content_type = ContentType.objects.get(model=ct_model)
+        content_type = ContentType.objects.get_by_natural_key('mainapp', ct_model)
         product = content_type.model_class().objects.get(slug=product_slug)
-        cart_product, created = CartProduct.objects.get_or_create(
-            user=self.cart.owner, cart=self.cart, content_type=content_type, object_id=product.id
-        )
-        if created:
-            self.cart.products.add(cart_product)
-        recalc_cart(self.cart)
+        with transaction.atomic():
+            cart_product, created = CartProduct.objects.get_or_create(
+                cart=self.cart, content_type=content_type, object_id=product.id,
+                defaults={'user': self.cart.owner, 'content_object': product}
+            )
+            if created:
+                self.cart.products.add(cart_product)
+                apply_cart_delta(self.cart, cart_product.final_price, 1)
+        remember_cart(request, self.cart)
         messages.add_message(request, messages.INFO, 'Товар успешно добавлен!')
         return HttpResponseRedirect('/cart/')
 
@@ -82,14 +108,17 @@ class DeleteFromCartView(CartMixin, View):
 
     def get(self, request, *args, **kwargs):
         ct_model, product_slug = kwargs.get('ct_model'), kwargs.get('slug')
-        content_type = ContentType.objects.get(model=ct_model)
+        content_type = ContentType.objects.get_by_natural_key('mainapp', ct_model)
         product = content_type.model_class().objects.get(slug=product_slug)
-        cart_product = CartProduct.objects.get(
-            user=self.cart.owner, cart=self.cart, content_type=content_type, object_id=product.id
-        )
-        self.cart.products.remove(cart_product)
-        cart_product.delete()
-        recalc_cart(self.cart)
+        with transaction.atomic():
+            cart_product = CartProduct.objects.filter(
+                cart=self.cart, content_type=content_type, object_id=product.id
+            ).first()
+            if cart_product is not None:
+                deleted, _ = CartProduct.objects.filter(pk=cart_product.pk).delete()
+                if deleted:
+                    apply_cart_delta(self.cart, -cart_product.final_price, -1)
+        remember_cart(request, self.cart)
         messages.add_message(request, messages.INFO, 'Товар удален!')
         return HttpResponseRedirect('/cart/')
 
@@ -98,15 +127,21 @@ class ChangeQTYView(CartMixin, View):
 
     def post(self, request, *args, **kwargs):
         ct_model, product_slug = kwargs.get('ct_model'), kwargs.get('slug')
-        content_type = ContentType.objects.get(model=ct_model)
+        content_type = ContentType.objects.get_by_natural_key('mainapp', ct_model)
         product = content_type.model_class().objects.get(slug=product_slug)
-        cart_product = CartProduct.objects.get(
-            user=self.cart.owner, cart=self.cart, content_type=content_type, object_id=product.id
-        )
         qty = int(request.POST.get('qty'))
-        cart_product.qty = qty
-        cart_product.save()
-        recalc_cart(self.cart)
+        with transaction.atomic():
+            cart_product = CartProduct.objects.select_for_update().filter(
+                user=self.cart.owner, cart=self.cart, content_type=content_type, object_id=product.id
+            ).first()
+            if cart_product is not None:
+                final_price = qty * product.price
+                updated = CartProduct.objects.filter(pk=cart_product.pk, qty=cart_product.qty).update(
+                    qty=qty, final_price=final_price
+                )
+                if updated:
+                    apply_cart_delta(self.cart, final_price - cart_product.final_price)
+        remember_cart(request, self.cart)
         messages.add_message(request, messages.INFO, 'Сумма пересчитанна!')
         return HttpResponseRedirect('/cart/')
 
@@ -115,8 +150,11 @@ class CartView(CartMixin, View):
 
     def get(self, request, *args, **kwargs):
         categories = Category.objects.get_categories_for_left_sidebar()
+        cart_lines = get_cart_lines(self.cart)
         context = {
             'cart': self.cart,
+            'cart_lines': cart_lines,
+            'cart_lines_count': len(cart_lines),
             'categories': categories
         }
         return render(request, 'cart.html', context)
@@ -127,8 +165,11 @@ class CheckoutView(CartMixin, View):
     def get(self, request, *args, **kwargs):
         categories = Category.objects.get_categories_for_left_sidebar()
         form = OrderForm(request.POST or None)
+        cart_lines = get_cart_lines(self.cart)
         context = {
             'cart': self.cart,
+            'cart_lines': cart_lines,
+            'cart_lines_count': len(cart_lines),
             'categories': categories,
             'form': form
         }
@@ -140,8 +181,8 @@ class MakeOrderView(CartMixin, View):
     @transaction.atomic
     def post(self, request, *args, **kwargs):
         form = OrderForm(request.POST or None)
-        customer = Customer.objects.get(user=request.user)
-        if form.is_valid():
+        customer = get_customer(request)
+        if customer is not None and form.is_valid():
             new_order = form.save(commit=False)
             new_order.customer = customer
             new_order.first_name = form.cleaned_data['first_name']
@@ -157,6 +198,53 @@ class MakeOrderView(CartMixin, View):
             new_order.cart = self.cart
             new_order.save()
             customer.orders.add(new_order)
+            forget_cart(request)
             messages.add_message(request, messages.INFO, 'Заказ оформлен')
             return HttpResponseRedirect('/')
         return HttpResponseRedirect('/checkout/')
+
+
+class SearchView(ConditionalGetMixin, CartMixin, View):
+
+    cart_summary_only = True
+    results_limit = 48
+
+    def get(self, request, *args, **kwargs):
+        query = request.GET.get('q', '').strip()
+        categories = Category.objects.get_categories_for_left_sidebar()
+        context = {
+            'categories': categories,
+            'query': query,
+            'products': search_products(query, limit=self.results_limit),
+            'cart': self.cart
+        }
+        return render(request, 'search.html', context)
+
+
+class ResizedImageView(View):
+
+    def get(self, request, *args, **kwargs):
+        width, height = kwargs['width'], kwargs['height']
+        if (width, height) not in settings.RESIZED_IMAGE_SIZES:
+            raise Http404
+        try:
+            source_path = safe_join(settings.MEDIA_ROOT, kwargs['path'])
+        except SuspiciousFileOperation:
+            raise Http404
+        if source_path.startswith(settings.RESIZED_IMAGE_CACHE_DIR) or not os.path.isfile(source_path):
+            raise Http404
+        image_format = request.GET.get('format')
+        if image_format not in RESIZED_FORMATS:
+            image_format = 'webp' if 'image/webp' in request.META.get('HTTP_ACCEPT', '') else 'jpeg'
+        try:
+            path = get_resized_image(source_path, width, height, image_format)
+        except OSError:
+            raise Http404
+        response = FileResponse(open(path, 'rb'), content_type=RESIZED_FORMATS[image_format][1])
+        if request.GET.get('v') == get_image_version(source_path):
+            max_age = settings.RESIZED_IMAGE_MAX_AGE
+        else:
+            max_age = settings.RESIZED_IMAGE_UNVERSIONED_MAX_AGE
+        patch_cache_control(response, public=True, max_age=max_age)
+        patch_vary_headers(response, ('Accept',))
+        return response
@@ -0,0 +1,26 @@
+from django.urls import path
+
+from mainapp.api.api_views import (
+    SmartphoneListAPIView,
+    SmartphoneDetailAPIView,
+    BrickListAPIView,
+    BrickDetailAPIView,
+    BuildingBlockListAPIView,
+    BuildingBlockDetailAPIView
+)
+from mainapp.async_views import async_api_view, base_view, category_detail_view, product_detail_view
+
+from .urls import urlpatterns as sync_urlpatterns
+
+
+urlpatterns = [
+    path('', base_view, name='base'),
+    path('products/<str:ct_model>/<str:slug>/', product_detail_view, name='product_detail'),
+    path('category/<str:slug>', category_detail_view, name='category_detail'),
+    path('api/smartphones/', async_api_view(SmartphoneListAPIView), name='smartphone_list'),
+    path('api/smartphones/<str:id>/', async_api_view(SmartphoneDetailAPIView), name='smartphone_detail'),
+    path('api/bricks/', async_api_view(BrickListAPIView), name='brick_list'),
+    path('api/bricks/<str:id>/', async_api_view(BrickDetailAPIView), name='brick_detail'),
+    path('api/buildingblocks/', async_api_view(BuildingBlockListAPIView), name='buildingblock_list'),
+    path('api/buildingblocks/<str:id>/', async_api_view(BuildingBlockDetailAPIView), name='buildingblock_detail')
+] + sync_urlpatterns
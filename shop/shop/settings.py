@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'mainapp.middleware.QueryStatsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -83,11 +84,38 @@ WSGI_APPLICATION = 'shop.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'mainapp.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE'
+        }
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': 'file:{}?mode=ro'.format(BASE_DIR / 'db.sqlite3'),
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'timeout': 20,
+            'uri': True
+        },
+        'TEST': {
+            'MIRROR': 'default'
+        }
     }
 }
 
+DATABASE_ROUTERS = ['mainapp.db.PrimaryReplicaRouter']
+
+SQLITE_PRAGMAS = (
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('temp_store', 'MEMORY'),
+    ('cache_size', -20000),
+    ('mmap_size', 256 * 1024 * 1024)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -131,6 +159,63 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+RESIZED_IMAGE_SIZES = ((300, 300), (600, 600))
+RESIZED_IMAGE_CACHE_DIR = os.path.join(MEDIA_ROOT, 'cache', 'r')
+RESIZED_IMAGE_CACHE_MAX_BYTES = 512 * 1024 * 1024
+RESIZED_IMAGE_MAX_AGE = 60 * 60 * 24 * 365
+RESIZED_IMAGE_UNVERSIONED_MAX_AGE = 60 * 10
+
+QUERY_STATS_ENABLED = DEBUG
+QUERY_STATS_DUPLICATE_THRESHOLD = 3
+QUERY_LOG_LEVEL = os.environ.get('QUERY_LOG_LEVEL', 'WARNING')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler'
+        }
+    },
+    'loggers': {
+        'mainapp.queries': {
+            'handlers': ['console'],
+            'level': QUERY_LOG_LEVEL,
+            'propagate': False
+        }
+    }
+}
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+PAGE_CACHE_STATS_FLUSH_INTERVAL = 10
+PRODUCT_SPEC_CACHE_TIMEOUT = 60 * 60 * 24
+
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': MEMCACHED_LOCATION.split(',')
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {
+                'MAX_ENTRIES': 50000
+            }
+        }
+    }
+
+LOCAL_CACHE_MAX_ENTRIES = 2000
+LOCAL_CACHE_MAX_BYTES = 64 * 1024 * 1024
+LOCAL_CACHE_TIMEOUT = 60
+CACHE_VERSION_TTL = 60 * 5
+CACHE_VERSION_STAMP = os.path.join(BASE_DIR, 'cache_versions.stamp')
+CACHE_LOCK_TIMEOUT = 10
+
 STATICFILES_DIRS = (
     os.path.join(BASE_DIR, 'static_dev'),
 )
@@ -0,0 +1,3 @@
+from .settings import *  # noqa
+
+ROOT_URLCONF = 'shop.asgi_urls'